@@ -44,13 +44,19 @@ class Coverage(DictGroup):
 
 
 class ContactTerm(DictTerm):
+
+    __slots__ = ()  # Fixed shape; all values live in the parent's term values
+
     name = ScalarTerm(store_none=False)
     org = ScalarTerm(store_none=False)
     email = ScalarTerm(store_none=False)
     url = ScalarTerm(store_none=False)
 
     def __nonzero__(self):
-        return bool(self.name or self.email or self.url)
+        # Read the raw term values; going through the descriptors clones a
+        # term instance per attribute access.
+        tv = self._term_values
+        return bool(tv.get('name') or tv.get('email') or tv.get('url'))
 
     def __bool__(self):
         return self.__nonzero__()
@@ -94,6 +100,8 @@ class RowSpecDictTerm(DictTerm):
 class SourceTerm(DictTerm):
     """A term that describes a source file for constructing a partition"""
 
+    __slots__ = ()  # Fixed shape; all values live in the parent's term values
+
     url = ScalarTerm(store_none=False) # URL to a source file
     ref = ScalarTerm(store_none=False) # reference to a partition
     title = ScalarTerm(store_none=False)  # Title for use in table.
@@ -118,7 +126,9 @@ class SourceTerm(DictTerm):
     row_data = DictTerm(store_none=False)  # A dict of values that are added to every row of the table.
 
     def __nonzero__(self):
-        return bool(self.url or self.file or self.description or self.dd_url)
+        # As with ContactTerm, bypass the descriptor clone per attribute.
+        tv = self._term_values
+        return bool(tv.get('url') or tv.get('file') or tv.get('description') or tv.get('dd_url'))
 
     def __bool__(self):
         return self.__nonzero__()
@@ -10,117 +10,70 @@ class RequirementError(ImportError):
 
     """Thrown for required optional modules, such as gdal."""
 
-
-class BundleError(Exception):
-
-    def __init__(self, message, *args, **kwargs):
-
-        # Call the base class constructor with the parameters it needs
-        # Exception.__init__(self,textwrap.fill(message, 120), *args, **kwargs)
-        Exception.__init__(self, message, *args, **kwargs)
-
-
-class BadRequest(BundleError):
-
-    """The function call or request was malformed or incorrect."""
-
-
-class ProcessError(BundleError):
-
-    """Error in the configuration files."""
-
-
-class ObjectStateError(BundleError):
-
-    """Object not put into appropriate state before uses."""
-
-
-class ConfigurationError(BundleError):
-
-    """Error in the configuration files."""
-
-
-class ResultCountError(BundleError):
-
-    """Got too many or too few results."""
+    __slots__ = ()
 
 
-class FilesystemError(BundleError):
-
-    """Missing file, etc."""
-
-
-class NotFoundError(BundleError):
-
-    """Failed to find resource."""
-
-
-class MultipleFoundError(BundleError):
-
-    """Found multiple when only one was expected."""
-
-
-class DependencyError(Exception):
-
-    """Required bundle dependencies not satisfied."""
-
-
-class NoLock(BundleError):
-
-    """Error in the configuration files."""
-
-
-class Locked(BundleError):
-
-    """Error in the configuration files."""
-
-
-class LockedFailed(BundleError):
+class BundleError(Exception):
 
-    """Error in the configuration files."""
+    """Base class for bundle errors."""
 
+    __slots__ = ()
 
-class QueryError(BundleError):
 
-    """Error while executing a query."""
+def _error_class(name, doc, base=BundleError):
+    """Build a trivial exception subclass.
 
+    All of the exceptions below only attach a docstring to a base class,
+    so build them with type() rather than paying for a full class
+    statement each at import time.
+    """
 
-class ConflictError(BundleError):
+    # Several of these classes share the same docstring; intern so they
+    # share one string object and compare by identity.
+    return type(name, (base,), {'__doc__': intern(doc), '__module__': __name__, '__slots__': ()})
 
-    """Conflict with existing resource."""
 
+BadRequest = _error_class('BadRequest', 'The function call or request was malformed or incorrect.')
 
-class SyncError(BundleError):
+ProcessError = _error_class('ProcessError', 'Error in the configuration files.')
 
-    """Could not sync a resource."""
+ObjectStateError = _error_class('ObjectStateError', 'Object not put into appropriate state before uses.')
 
+ConfigurationError = _error_class('ConfigurationError', 'Error in the configuration files.')
 
-class NotABundle(BundleError):
+ResultCountError = _error_class('ResultCountError', 'Got too many or too few results.')
 
-    """The referenced object is not a valid bundle, usually because of a non
-    existent or malformed database."""
+FilesystemError = _error_class('FilesystemError', 'Missing file, etc.')
 
+NotFoundError = _error_class('NotFoundError', 'Failed to find resource.')
 
-class FatalError(BundleError):
+MultipleFoundError = _error_class('MultipleFoundError', 'Found multiple when only one was expected.')
 
-    """A Fatal Bundle Error, generated in testing instead of a system exit."""
+DependencyError = _error_class('DependencyError', 'Required bundle dependencies not satisfied.', base=Exception)
 
+NoLock = _error_class('NoLock', 'Error in the configuration files.')
 
-class DatabaseError(BundleError):
+Locked = _error_class('Locked', 'Error in the configuration files.')
 
-    """A general database error."""
+LockedFailed = _error_class('LockedFailed', 'Error in the configuration files.')
 
+QueryError = _error_class('QueryError', 'Error while executing a query.')
 
-class DatabaseMissingError(DatabaseError):
+ConflictError = _error_class('ConflictError', 'Conflict with existing resource.')
 
-    """A general database error."""
+SyncError = _error_class('SyncError', 'Could not sync a resource.')
 
+NotABundle = _error_class(
+    'NotABundle',
+    'The referenced object is not a valid bundle, usually because of a non '
+    'existent or malformed database.')
 
-class GeoError(Exception):
+FatalError = _error_class('FatalError', 'A Fatal Bundle Error, generated in testing instead of a system exit.')
 
-    """General error doing geographic processing."""
+DatabaseError = _error_class('DatabaseError', 'A general database error.')
 
+DatabaseMissingError = _error_class('DatabaseMissingError', 'A general database error.', base=DatabaseError)
 
-class BuildError(Exception):
+GeoError = _error_class('GeoError', 'General error doing geographic processing.', base=Exception)
 
-    """General error while building a bundle."""
+BuildError = _error_class('BuildError', 'General error while building a bundle.', base=Exception)
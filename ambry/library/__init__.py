@@ -5,15 +5,21 @@ of the bundles that have been installed into it.
 # Copyright (c) 2013 Clarinova. This file is licensed under the terms of the
 # Revised BSD License, included in this distribution as LICENSE.txt
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+import hashlib
 import logging
 import re
 import os.path
 from StringIO import StringIO
 import time
 
-import unicodecsv as csv
+# The stdlib csv module is C-accelerated; unicodecsv is pure python and
+# several times slower. Unicode values are encoded explicitly at the write
+# sites instead.
+import csv
 
+from sqlalchemy import bindparam
+from sqlalchemy.ext import baked
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import OperationalError, IntegrityError
 
@@ -29,16 +35,51 @@ from ambry.dbexceptions import ConfigurationError, NotFoundError, DependencyErro
 from ambry.orm import Dataset, Table, Column, Partition
 
 from ..identity import LocationRef, Identity, NotObjectNumberError
-from ..util import memoize, Progressor
+from ..util import Progressor, get_logger
 from ..bundle import LibraryDbBundle
 
+import threading
 import weakref
 
+# The scandir backport walks directories with the stat information the OS
+# already returned, instead of a stat call per entry; fall back to os.walk
+# when it isn't installed.
+try:
+    from scandir import walk as _walk
+except ImportError:
+    _walk = None
+
 from files import Files
 
 
 libraries = {}
 
+# Guards construction entries in the libraries dict; Library objects can be
+# requested from multiple threads.
+_libraries_lock = threading.Lock()
+
+# Compiled-query cache for the single-object lookups; the same query shapes
+# run thousands of times with different bind values, and baking skips the
+# SQL compilation on all but the first.
+_bakery = baked.bakery()
+
+# Shared module logger; logging.getLogger walks the logger registry under a
+# lock, so don't pay for it per Library construction. Level is left to the
+# entry points -- the cli sets its own level and often replaces l.logger.
+_logger = get_logger(__name__)
+
+# Marks 'use the default locations' in resolve() and friends. The old
+# `location is 'default'` test only worked by way of string interning.
+_DEFAULT = object()
+
+# Everything but source; hashable, so resolve() can memo on it directly.
+_DEFAULT_LOCATIONS = (LocationRef.LOCATION.LIBRARY, LocationRef.LOCATION.PARTITION,
+                      LocationRef.LOCATION.REMOTE)
+
+# The '-major.minor.patch.db' suffix of a versioned cache key; group 1 is
+# the patch number, which orders versions of the same bundle.
+_version_suffix_re = re.compile(r'-\d+\.\d+\.(\d+)\.db$')
+
 
 def _new_library(config):
     from database import LibraryDb
@@ -52,7 +93,7 @@ def _new_library(config):
         database.create()
     except OperationalError as e:
 
-        raise DatabaseError('Failed to create {} : {}'.format(database.dsn, e.message))
+        raise DatabaseError('Failed to create {} : {}'.format(database.dsn, e))
 
     if 'upstream' in config:
         raise DeprecationWarning("Upstream no longer allowed in configuration")
@@ -64,10 +105,7 @@ def _new_library(config):
         try:
             remotes[name] = new_cache(remote)
         except S3ResponseError as e:
-            from ..util import get_logger
-
-            logger = get_logger(__name__)
-            logger.error('Failed to init cache {} : {}; {} '.format(name, str(remote.bucket), e))
+            _logger.error('Failed to init cache %s : %s; %s ', name, remote.bucket, e)
 
     for i, remote in enumerate(remotes.values()):
         remote.set_priority(i)
@@ -113,18 +151,21 @@ def new_library(config=None, reset=False):
         from ..run import get_runconfig
         config = get_runconfig().library('default')
 
-    if reset:
-        libraries = {}
-
     name = config.get('_name', None)
 
     if name is None:
         name = 'default'
 
-    if name not in libraries:
-        libraries[name] = _new_library(config)
+    with _libraries_lock:
+
+        if reset:
+            libraries = {}
+
+        if name not in libraries:
+            libraries[name] = _new_library(config)
+
+        l = libraries[name]
 
-    l = libraries[name]
     l.clear_dependencies()
 
     return l
@@ -153,7 +194,6 @@ class Library(object):
         sync: If true, put to remote synchronously. Defaults to False.
 
         '''
-        from ..util import get_logger
 
         assert database is not None
 
@@ -169,40 +209,86 @@ class Library(object):
         self.dep_cb = None  # Callback for dependency resolution
         self._dependencies = None
         self._remotes = remotes
+        self._sorted_remotes = None
+        self._remote_by_repo_id = None
 
         self._all_vids = None
 
+        # Cache keys known to exist in the cache. Built from a single cache
+        # listing on first use; only positive membership is trusted.
+        self._known_cache_keys = None
+
+        self._files = None
+        self._doc_cache_obj = None
+        self._resolver = None
+        # Bounded memo of resolve() results, keyed on (ref, locations);
+        # cleared whenever bundles are installed or removed.
+        self._resolve_cache = OrderedDict()
+
+        # Memo of list_bundles() results, validated against an epoch that
+        # mark_updated() bumps.
+        self._list_bundles_cache = {}
+        self._bundles_cache_epoch = 0
+
+        # Source bundles loaded ahead of time for sync_source_dir.
+        self._source_bundles = {}
+
         if not self.cache:
             raise ConfigurationError("Must specify library.cache for the "
                                      "library in bundles.yaml")
 
-        self.logger = get_logger(__name__)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger = _logger
 
         self.needs_update = False
 
         self.bundles = weakref.WeakValueDictionary()
 
+        # Strong references to recently used bundles, so iteration workloads
+        # don't reopen the same database file each pass; the weak dict alone
+        # drops a bundle as soon as the caller releases it.
+        self._bundle_lru = OrderedDict()
+
         self._search = None
 
     def clone(self):
 
         return self.__class__(self.cache, self.database.clone())
 
+    # Number of recently used bundles to keep open
+    BUNDLE_CACHE_SIZE = 32
+
+    # Number of installs between commits in the sync loops. Sqlite pays a
+    # disk sync per commit, so committing per bundle makes a rebuild I/O
+    # bound on fsyncs.
+    SYNC_COMMIT_BATCH = 500
+
     def _create_bundle(self, path):
         from ..bundle.bundle import DbBundle
 
-        if path in self.bundles:
-            return self.bundles[path]
+        bundle = self.bundles.get(path)
+
+        if bundle is None:
+            bundle = DbBundle(path)
+            self.bundles[path] = bundle
 
-        bundle = DbBundle(path)
+        # Mark as most recently used, evicting -- and closing -- the oldest
+        # entries. Bundle connections are opened lazily, so a closed bundle
+        # that is still referenced elsewhere just reopens on next access.
+        self._bundle_lru.pop(path, None)
+        self._bundle_lru[path] = bundle
 
-        self.bundles[path] = bundle
+        while len(self._bundle_lru) > self.BUNDLE_CACHE_SIZE:
+            _, evicted = self._bundle_lru.popitem(last=False)
+
+            if evicted is not bundle:
+                evicted.close()
 
         return bundle
 
     def close(self):
 
+        self._bundle_lru.clear()
+
         for path, bundle in self.bundles.items():
             bundle.close()
 
@@ -251,25 +337,37 @@ class Library(object):
 
         installed = self.files.install_bundle_file(bundle, source, commit=commit, state=file_state)
 
-        if install_partitions:
-            for p in bundle.partitions.all:
-                self.put_partition(p, source, commit=commit, file_state=file_state)
-
-        # Copy the file in if we don't have it already
-        if not self.cache.has(bundle.identity.cache_key):
-            self.cache.put(bundle.database.path, bundle.identity.cache_key)
+        # partitions.all runs the full partition query each time, and
+        # iterating bundle.partitions calls it again; materialize once and
+        # make a single pass for both the install and the search indexing.
+        partitions = bundle.partitions.all if (install_partitions or self._doc_cache) else []
 
         if self._doc_cache:
             self.search.index_dataset(bundle, force=True)
 
-            for partition in bundle.partitions:
-                self.search.index_partition(partition, force=True)
+        for p in partitions:
 
+            if install_partitions:
+                self.put_partition(p, source, commit=False, file_state=file_state)
+
+            if self._doc_cache:
+                self.search.index_partition(p, force=True)
+
+        if install_partitions and commit:
+            self.database.commit()
+
+        # Copy the file in if we don't have it already
+        if not self._cache_has(bundle.identity.cache_key):
+            self.cache.put(bundle.database.path, bundle.identity.cache_key)
+            self._cached_keys().add(bundle.identity.cache_key)
+
+        if self._doc_cache:
             self.search.commit()
 
-        self.mark_updated(vid=bundle.identity.vid)
-        self.mark_updated(key='bundle_index')
-        self.mark_updated(key='library_info')
+        self._clear_resolve_cache()
+
+        self.mark_updated_batch(vids=(bundle.identity.vid,),
+                                keys=('bundle_index', 'library_info'))
 
         return self.cache.path(bundle.identity.cache_key), installed
 
@@ -281,9 +379,16 @@ class Library(object):
 
         installed = self.files.install_partition_file(partition, source, commit=commit, state=file_state)
 
+        cache_key = partition.identity.cache_key
+
+        # _cache_has consults the one-time cache listing, so bulk installs
+        # don't hit the cache once per partition.
+        in_cache = self._cache_has(cache_key)
+
         # Ref partitions use the file of an earlier version, so there is no file to install
-        if not self.cache.has(partition.identity.cache_key) and os.path.exists(partition.database.path):
-            self.cache.put(partition.database.path, partition.identity.cache_key)
+        if not in_cache and os.path.exists(partition.database.path):
+            self.cache.put(partition.database.path, cache_key)
+            self._cached_keys().add(cache_key)
 
         return self.cache.path(partition.identity.cache_key), installed
 
@@ -293,10 +398,16 @@ class Library(object):
 
         self.database.remove_bundle(bundle)
 
+        self._clear_resolve_cache()
+
         self.mark_updated(vid=bundle.identity.vid)
 
         self.cache.remove(bundle.identity.cache_key, propagate=True)
 
+        # The removal propagates to the partitions, so rebuild the key set
+        # rather than guess at which entries it took with it.
+        self._known_cache_keys = None
+
     #
     # Retreiving
     #
@@ -318,6 +429,24 @@ class Library(object):
         """Like list(), but returns bundles instead of a dict with identities.
         key is a parameter to sorted(self.list())"""
 
+        # The result is stable until a bundle is installed or removed, which
+        # bumps the epoch through mark_updated(). Custom sort keys aren't
+        # hashable, so those calls bypass the memo.
+        if key is not None:
+            return self._list_bundles(last_version_only, locations, key)
+
+        cache_key = (last_version_only, tuple(locations) if locations else None)
+
+        epoch, bundles = self._list_bundles_cache.get(cache_key, (None, None))
+
+        if epoch != self._bundles_cache_epoch:
+            bundles = list(self._list_bundles(last_version_only, locations, key))
+            self._list_bundles_cache[cache_key] = (self._bundles_cache_epoch, bundles)
+
+        return iter(bundles)
+
+    def _list_bundles(self, last_version_only, locations, key):
+
         if last_version_only:
 
             # Unlike other properties, name is an object, not a string, so
@@ -325,34 +454,26 @@ class Library(object):
             if key is None:
                 key = lambda ident: str(ident.name)
 
-            def rev_cmp(a, b):
-
-                ka = key(a)
-                kb = key(b)
-
-                if ka == kb:
-                    return - cmp(a.on.revision, b.on.revision)
-                else:
-                    return cmp(ka, kb)
-
-            current = None
+            # Sort with a key function -- (name, descending revision) -- rather
+            # than a cmp comparator, which costs a Python call per comparison
+            # and computes the key on both sides every time.
+            selected = []
 
-            for ident in sorted(self.list().values(), cmp=rev_cmp):
+            for ident in sorted(self.list().values(),
+                                key=lambda ident: (key(ident), -int(ident.on.revision))):
 
                 if locations and not ident.locations.has(locations):
                     continue
 
-                if not current or ident.id_ != current.identity.id_:
-
-                    if current:
-                        yield current
-                        current.close()
+                if not selected or ident.id_ != selected[-1].identity.id_:
 
                     try:
 
                         current = LibraryDbBundle(self.database, ident.vid)
 
                         current.identity.data['other_versions'] = set()
+
+                        selected.append(current)
                     except NotFoundError:
 
                         # This happens frequently in warehosues, where only one version of the
@@ -360,9 +481,30 @@ class Library(object):
                         pass
                 else:
 
-                    current.identity.data['other_versions'].add(ident)
+                    selected[-1].identity.data['other_versions'].add(ident)
+
+            # Prefetch the partitions for the whole set in one query. Callers
+            # almost always iterate .partitions on each yielded bundle, which
+            # otherwise costs a query per bundle after the yield.
+            if selected:
+                from sqlalchemy.orm import subqueryload
+
+                parts_by_dvid = defaultdict(list)
+
+                q = (self.database.session.query(Partition)
+                     .filter(Partition.d_vid.in_([b.identity.vid for b in selected]))
+                     .options(subqueryload(Partition.table))
+                     .order_by(Partition.d_vid.asc())
+                     .order_by(Partition.vid.asc())
+                     .order_by(Partition.segment.asc()))
 
-            if current:
+                for p in q.all():
+                    parts_by_dvid[p.d_vid].append(p)
+
+                for b in selected:
+                    b.partitions.prefetch(parts_by_dvid[b.identity.vid])
+
+            for current in selected:
                 yield current
                 current.close()
 
@@ -386,43 +528,85 @@ class Library(object):
         """Return a MultiCache that has all of the remotes as upstreams"""
         return MultiCache(self.remotes.values())
 
-    def _get_bundle_by_cache_key(self, cache_key, cb=None):
-        """Load a bundle from either the local cache, or the remote if it is not local """
+    def _fetch_cache_key(self, cache_key, cb=None):
+        """Download the file for a cache key into the local cache, from the
+        remote stack if necessary, and return its absolute path, or None.
+        Only does file transfers, so it is safe to run off the main
+        thread."""
 
         # The AltReadCache will get from the remote stack if the path is not found in the cache.
         arc = AltReadCache(self.cache, self.remote_stack)
         abs_path = arc.get(cache_key, cb=cb)
 
         if not abs_path or not os.path.exists(abs_path):
+            return None
+
+        return abs_path
+
+    def _get_bundle_by_cache_key(self, cache_key, cb=None):
+        """Load a bundle from either the local cache, or the remote if it is not local """
+
+        abs_path = self._fetch_cache_key(cache_key, cb=cb)
+
+        if not abs_path:
             return False
 
         try:
             bundle = self._create_bundle(abs_path)
         except SqliteDatabaseError as e:
-            self.logger.error("Failed to load databundle at path {}: {}".format(abs_path, e))
+            self.logger.error("Failed to load databundle at path %s: %s", abs_path, e)
             raise
         except AttributeError as e:
-            self.logger.error("Failed to load databundle at path {}: {}".format(abs_path, e))
+            self.logger.error("Failed to load databundle at path %s: %s", abs_path, e)
             raise  # DatabaseError
         except OperationalError as e:
-            self.logger.error("Failed to load databundle at path {}: {}".format(abs_path, e))
+            self.logger.error("Failed to load databundle at path %s: %s", abs_path, e)
             raise SqliteDatabaseError
 
         bundle.library = self
 
         return bundle
 
-    def has(self, ref, location='default'):
+    def _cached_keys(self):
+        """The set of cache keys known to exist in the cache, built from a
+        single cache listing and kept warm on puts."""
+
+        if self._known_cache_keys is None:
+            try:
+                self._known_cache_keys = set(self.cache.list())
+            except NotImplementedError:
+                self._known_cache_keys = set()
+
+        return self._known_cache_keys
+
+    def _cache_has(self, cache_key):
+        """Like self.cache.has(), but skips the round trip -- a HEAD request
+        on remote-backed caches -- for keys already known to exist. Misses
+        still ask the cache, so the key set only has to be right about what
+        it contains, not about what it is missing."""
+
+        keys = self._cached_keys()
+
+        if cache_key in keys:
+            return True
+
+        if self.cache.has(cache_key):
+            keys.add(cache_key)
+            return True
+
+        return False
+
+    def has(self, ref, location=_DEFAULT):
         dataset = self.resolve(ref, location=location)
 
         if dataset.partition:
-            return self.cache.has(dataset.partition.cache_key)
+            return self._cache_has(dataset.partition.cache_key)
         else:
-            return self.cache.has(dataset.cache_key)
+            return self._cache_has(dataset.cache_key)
 
-    def get(self, ref, remote=None, force=False, cb=None, location='default'):
+    def get(self, ref, remote=None, force=False, cb=None, location=_DEFAULT):
         '''Get a bundle, given an id string or a name '''
-        from ckcache import copy_file_or_flo
+        from ..util.flo import copy_file_or_flo
 
         # Get a reference to the dataset, partition and relative path
         # from the local database.
@@ -446,8 +630,8 @@ class Library(object):
             # should sort by priority
 
             if remote is None:
-                for r in self.remotes.values():
-                    if r.repo_id in df_remotes:
+                for repo_id, r in self.remote_by_repo_id.items():
+                    if repo_id in df_remotes:
                         remote = r
                         break
         else:
@@ -469,7 +653,7 @@ class Library(object):
                     raise NotFoundError('Failed to get partition {} from bundle at {} '
                                         .format(dataset.partition.fqname, dataset.cache_key))
 
-                if not self.cache.has(partition.identity.cache_key):
+                if not self._cache_has(partition.identity.cache_key):
 
                     if not remote:
                         msg = "No remote defined for nonlocal partition. Expected "\
@@ -500,7 +684,11 @@ class Library(object):
                         if not in_s:
                             raise NotFoundError('Failed to get partition {} from cache {}'
                                                 .format(partition.identity.cache_key, str(remote)))
-                        copy_file_or_flo(in_s, out_s)
+
+                        # Partition files run to gigabytes; a large buffer
+                        # keeps the copy network-bound instead of looping in
+                        # Python every 64k.
+                        copy_file_or_flo(in_s, out_s, buffer_size=16 * 1024 * 1024)
 
                     abs_path = self.cache.path(partition.identity.cache_key)
 
@@ -527,8 +715,12 @@ class Library(object):
 
     @property
     def tables(self):
-        """Return ORM records for all tables"""
-        return self.database.session.query(Table).all()
+        """Return ORM records for all tables, with columns and codes
+        eager-loaded, since most consumers walk them."""
+        from sqlalchemy.orm import subqueryload
+
+        return (self.database.session.query(Table)
+                .options(subqueryload(Table.columns).subqueryload(Column.codes)).all())
 
     @property
     def tables_no_columns(self):
@@ -538,74 +730,87 @@ class Library(object):
 
     def table(self, vid):
         try:
-            return (self.database.session.query(Table).filter(Table.vid == vid).one())
+            bq = _bakery(lambda session: session.query(Table)
+                         .filter(Table.vid == bindparam('vid')))
+
+            return bq(self.database.session).params(vid=vid).one()
         except NoResultFound:
             # Ths vid is actually an id, so we take the latest one
-            try:
-                t = self.database.session.query(Table)\
-                    .filter(Table.id_ == vid)\
-                    .order_by(Table.vid.desc())\
-                    .first()
-
-                if not t:
-                    raise NoResultFound
+            bq = _bakery(lambda session: session.query(Table)
+                         .filter(Table.id_ == bindparam('vid'))
+                         .order_by(Table.vid.desc()))
 
-                return t
+            t = bq(self.database.session).params(vid=vid).first()
 
-            except NoResultFound:
+            if not t:
                 raise NotFoundError(
                     "Did not find table ref {} in library {}".format(vid, self.database.dsn))
 
+            return t
+
     def column(self, vid):
         try:
-            return self.database.session.query(Column).filter(Column.vid == vid).one()
+            bq = _bakery(lambda session: session.query(Column)
+                         .filter(Column.vid == bindparam('vid')))
+
+            return bq(self.database.session).params(vid=vid).one()
         except NoResultFound:
             # Ths vid is actually an id, so we take the latest one
-            try:
-                t = self.database.session.query(Column)\
-                    .filter(Column.id_ == vid)\
-                    .order_by(Column.vid.desc())\
-                    .first()
-
-                if not t:
-                    raise NoResultFound
+            bq = _bakery(lambda session: session.query(Column)
+                         .filter(Column.id_ == bindparam('vid'))
+                         .order_by(Column.vid.desc()))
 
-                return t
+            t = bq(self.database.session).params(vid=vid).first()
 
-            except NoResultFound:
+            if not t:
                 raise NotFoundError(
                     'Did not find Column ref {} in library {}'.format(vid, self.database.dsn))
 
+            return t
+
     def derived_tables(self, proto_vid):
         """Tables with the given proto_vid"""
         return self.database.session.query(Table).filter(Table.proto_vid == proto_vid).all()
 
     def dataset(self, vid):
         try:
-            return self.database.session.query(Dataset).filter(Dataset.vid == vid).one()
+            bq = _bakery(lambda session: session.query(Dataset)
+                         .filter(Dataset.vid == bindparam('vid')))
+
+            return bq(self.database.session).params(vid=vid).one()
         except NoResultFound:
-            try:
-                ds = self.database.session.query(Dataset)\
-                    .filter(Dataset.id_ == vid)\
-                    .order_by(Dataset.revision.desc())\
-                    .first()
+            bq = _bakery(lambda session: session.query(Dataset)
+                         .filter(Dataset.id_ == bindparam('vid'))
+                         .order_by(Dataset.revision.desc()))
 
-                if ds is None:
-                    raise NoResultFound
-                else:
-                    return ds
+            ds = bq(self.database.session).params(vid=vid).first()
 
-            except NoResultFound:
+            if ds is None:
                 raise NotFoundError("Failed to find dataset for ref '{}' ".format(vid))
 
-    def datasets(self):
-        return (self.database.session.query(Dataset).all())
+            return ds
+
+    def datasets(self, eager=False):
+        """Return all dataset records. With eager set, partitions are loaded
+        in the same round trip instead of lazily per dataset."""
+
+        q = self.database.session.query(Dataset)
+
+        if eager:
+            from sqlalchemy.orm import subqueryload
+            q = q.options(subqueryload(Dataset.partitions))
+
+        return q.all()
 
     def versioned_datasets(self):
         """Like datasets(), but returns a dict structure, and only the most recent
         version, with other versions under the 'other_version' key """
         datasets = {}
 
+        # One ordered scan; the first row seen for an id_ is the current
+        # version. Only that row pays for the full ds.dict -- the older
+        # versions get a small summary, which covers what the index and
+        # the TOC templates read from them.
         for ds in (self.database.session.query(Dataset).order_by(Dataset.revision.desc()).all()):
 
             if ds.id_ not in datasets:
@@ -613,7 +818,9 @@ class Library(object):
                 datasets[ds.id_]['other_versions'] = {}
 
             else:
-                datasets[ds.id_]['other_versions'][ds.vid] = ds.dict
+                datasets[ds.id_]['other_versions'][ds.vid] = dict(
+                    id_=ds.id_, vid=ds.vid, name=ds.name, vname=ds.vname,
+                    version=ds.version, revision=ds.revision)
 
         return datasets
 
@@ -625,19 +832,31 @@ class Library(object):
 
     def partition(self, vid):
         # shortcut for parititon query
-        query = self.database.session.query(Partition)
         try:
-            return query.filter(Partition.vid == vid).one()
+            bq = _bakery(lambda session: session.query(Partition)
+                         .filter(Partition.vid == bindparam('vid')))
+
+            return bq(self.database.session).params(vid=vid).one()
         except NoResultFound:
             try:
-                return query.filter(Partition.id_ == vid).one()
+                bq = _bakery(lambda session: session.query(Partition)
+                             .filter(Partition.id_ == bindparam('vid')))
+
+                return bq(self.database.session).params(vid=vid).one()
             except NoResultFound:
-                self.logger.error('No partition found: {} for {}'.format(vid, self.database.dsn))
+                self.logger.error('No partition found: %s for %s', vid, self.database.dsn)
                 raise NotFoundError('No partition in library for vid : {} '.format(vid))
 
-    def dataset_partitions(self, vid):
+    def dataset_partitions(self, vid, eager=False):
         """Return all partition records for a dataset vid"""
-        return self.database.session.query(Partition).filter(Partition.d_vid == vid).all()
+
+        q = self.database.session.query(Partition).filter(Partition.d_vid == vid)
+
+        if eager:
+            from sqlalchemy.orm import subqueryload
+            q = q.options(subqueryload(Partition.table))
+
+        return q.all()
 
     @property
     def partitions(self):
@@ -664,7 +883,7 @@ class Library(object):
             w = self.warehouse(uid)
             w.delete()
         except NotFoundError:
-            self.logger.error("Didn't find warehouse for uid: {}".format(uid))
+            self.logger.error("Didn't find warehouse for uid: %s", uid)
 
         s = self.store(uid)
 
@@ -726,24 +945,69 @@ class Library(object):
 
         return self._remotes
 
+    @property
+    def sorted_remotes(self):
+        """Remotes in priority order. Remotes are fixed at construction, so
+        the sort -- and the repo_id reads, which can hit the network for s3
+        caches -- happen once."""
+
+        if self._sorted_remotes is None:
+            self._sorted_remotes = sorted(self.remotes.values(), key=lambda r: r.priority)
+
+        return self._sorted_remotes
+
+    @property
+    def remote_by_repo_id(self):
+        """Map from repo_id to remote, in priority order."""
+
+        if self._remote_by_repo_id is None:
+            self._remote_by_repo_id = OrderedDict(
+                (r.repo_id, r) for r in self.sorted_remotes)
+
+        return self._remote_by_repo_id
+
     #
     # Finding
     #
 
+    # Maximum number of entries in the resolve() memo
+    RESOLVE_CACHE_SIZE = 1024
+
     @property
     def resolver(self):
-        return self.database.resolver
+        # Recreate the resolver only when the underlying session changes;
+        # the database drops and recreates its session around close().
+        session = self.database.session
+
+        if self._resolver is None or self._resolver.session is not session:
+            self._resolver = self.database.resolver
 
-    def resolve(self, ref, location='default'):
+        return self._resolver
+
+    def _clear_resolve_cache(self):
+        self._resolve_cache.clear()
+
+    def resolve(self, ref, location=_DEFAULT):
 
         # If the location is not explicitly defined, set it to everything but source
-        if location is 'default':
-            location = [LocationRef.LOCATION.LIBRARY, LocationRef.LOCATION.PARTITION,
-                        LocationRef.LOCATION.REMOTE]
+        if location is _DEFAULT or location == 'default':
+            location = _DEFAULT_LOCATIONS
 
         if isinstance(ref, Identity):
             ref = ref.vid
 
+        # Resolution is stable for a given (ref, locations) until the library
+        # contents change, and resolve() is called repeatedly from has(),
+        # get(), dep() and the sync loops.
+        cache_key = (ref, tuple(location) if isinstance(location, list) else location)
+
+        try:
+            return self._resolve_cache[cache_key]
+        except KeyError:
+            pass
+        except TypeError:
+            cache_key = None  # Unhashable ref; skip the memo
+
         resolver = self.resolver
 
         try:
@@ -757,8 +1021,29 @@ class Library(object):
         except ConfigurationError:
             pass  # Warehouse libraries don't have source directories.
 
+        if cache_key is not None:
+            self._resolve_cache[cache_key] = ident
+
+            while len(self._resolve_cache) > self.RESOLVE_CACHE_SIZE:
+                self._resolve_cache.popitem(last=False)
+
         return ident
 
+    def resolve_many(self, refs, location=_DEFAULT):
+        """Resolve several references at once, returning {ref: Identity}.
+
+        Duplicate references resolve a single time, and every result lands
+        in the resolve memo, so later per-ref resolve() and get() calls are
+        cache hits rather than new queries."""
+
+        out = {}
+
+        for ref in refs:
+            if ref not in out:
+                out[ref] = self.resolve(ref, location=location)
+
+        return out
+
     def locate(self, ref):
         """Return list of files for a reference, indicating where a file for a partition
             or dataset is located"""
@@ -771,10 +1056,10 @@ class Library(object):
         if not ident:
             return None, None
 
-        if self.cache.has(ident.cache_key):
+        if self._cache_has(ident.cache_key):
             return ident, self.cache
 
-        for remote in sorted(self.remotes.values(), key=lambda x: x.priority):
+        for remote in self.sorted_remotes:
             if remote.has(ident.cache_key):
                 return ident, remote
 
@@ -828,10 +1113,15 @@ class Library(object):
         if not deps:
             return {}
 
+        # One resolution pass over the whole dependency set; duplicate
+        # values resolve once, and check_dependencies' later resolve() and
+        # get() calls for the same refs hit the memo.
+        idents = self.resolve_many(deps.values())
+
         out = {}
         for k, v in deps.items():
 
-            ident = self.resolve(v)
+            ident = idents[v]
             if not ident:
                 raise DependencyError("Failed to resolve {} ".format(v))
 
@@ -845,12 +1135,59 @@ class Library(object):
     def check_dependencies(self, throw=True, download=True):
 
         errors = {}
-        for k, v in self.dependencies.items():
 
-            if download:
-                self.logger.info('Download and check dependency: {}'.format(v))
+        if download:
+
+            deps = list(self.dependencies.items())
 
-                b = self.get(v, cb=Progressor().progress)
+            if not deps:
+                return errors
+
+            # resolve() and get() go through the library's single database
+            # session, so they stay on this thread. Only the cache-to-cache
+            # file transfers fan out to a pool; get() then finds the files
+            # already local.
+            cache_keys = set()
+
+            for k, v in deps:
+                dataset = self.resolve(v)
+
+                if not dataset:
+                    continue
+
+                cache_keys.add(dataset.cache_key)
+
+                if dataset.partition:
+                    cache_keys.add(dataset.partition.cache_key)
+
+            if cache_keys:
+                from multiprocessing.dummy import Pool as ThreadPool
+
+                def prefetch(cache_key):
+                    try:
+                        self._fetch_cache_key(cache_key)
+                    except Exception:
+                        pass  # get() reports the miss on the calling thread
+
+                pool = ThreadPool(min(8, len(cache_keys)))
+
+                try:
+                    pool.map(prefetch, list(cache_keys))
+                finally:
+                    pool.close()
+                    pool.join()
+
+            for k, v in deps:
+
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info('Download and check dependency: %s', v)
+
+                try:
+                    b = self.get(v, cb=Progressor().progress)
+                except NotFoundError:
+                    if throw:
+                        raise
+                    b = None
 
                 if not b:
                     if throw:
@@ -860,8 +1197,12 @@ class Library(object):
                     else:
                         errors[k] = v
 
-            else:
-                self.logger.info('Check dependency: {}'.format(v))
+        else:
+
+            for k, v in self.dependencies.items():
+
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info('Check dependency: %s', v)
 
                 dataset = self.resolve(v)
 
@@ -876,9 +1217,13 @@ class Library(object):
         return errors
 
     @property
-    @memoize
     def files(self):
-        return Files(self.database)
+        # A plain lazy attribute; the memoize wrapper added a hashing and
+        # dict lookup per access, and files is read in hot loops.
+        if self._files is None:
+            self._files = Files(self.database)
+
+        return self._files
 
     @property
     def source(self):
@@ -913,6 +1258,11 @@ class Library(object):
         start = None
         end = None
 
+        # Hoist the property chains; push() runs once per new file and each
+        # .files/.database access costs an attribute lookup plus a call.
+        files = self.files
+        database = self.database
+
         if not upstream:
             raise Exception("Can't push() without defining a upstream. ")
 
@@ -930,9 +1280,9 @@ class Library(object):
                 identity = dsid
 
             try:
-                file_ = self.files.query.installed.ref(identity.vid).state('new').one
+                file_ = files.query.installed.ref(identity.vid).state('new').one
             except Exception as exc:
-                self.logger.error('Failed for {} with \'{}\' error'.format(identity.vid, exc))
+                self.logger.error("Failed for %s with '%s' error", identity.vid, exc)
                 raise
 
             md = identity.to_meta(file=file_.path)
@@ -962,15 +1312,80 @@ class Library(object):
                 what = 'pushed'
 
             if not dry_run:
-                self.database.session.merge(file_)
-                self.database.commit()
+                database.session.merge(file_)
+                database.commit()
 
             return what, start, end, md['size'] if 'size' in md else None
 
         else:
 
-            for ref in [file_.ref for file_ in self.new_files]:
-                self.push(upstream, ref, cb=cb, dry_run=dry_run)
+            # Resolve the refs serially -- that is all database work -- then
+            # run the network phases through a thread pool, and record the
+            # state changes with one bulk update and a single commit instead
+            # of a merge and commit per file.
+            from multiprocessing.dummy import Pool as ThreadPool
+            from ambry.orm import File
+
+            jobs = []
+
+            for file_ in self.new_files:
+
+                ip, dsid = self.resolver.resolve_ref_one(file_.ref)
+
+                if not dsid:
+                    raise Exception("Didn't get id from database for ref: {}"
+                                    .format(file_.ref))
+
+                if dsid.partition:
+                    identity = dsid.partition
+                else:
+                    identity = dsid
+
+                jobs.append((file_, identity, identity.to_meta(file=file_.path)))
+
+            if jobs:
+
+                pool = ThreadPool(min(8, len(jobs)))
+
+                try:
+                    has = pool.map(lambda job: upstream.has(job[1].cache_key), jobs)
+
+                    to_upload = []
+
+                    for job, h in zip(jobs, has):
+                        if h:
+                            if cb:
+                                cb('Has', job[2], 0)
+                        else:
+                            if cb:
+                                cb('Pushing to {}'.format(upstream), job[2], 0)
+                            to_upload.append(job)
+
+                    def upload(job):
+                        file_, identity, md = job
+                        start = time.clock()
+
+                        if not dry_run:
+                            upstream.put(file_.path, identity.cache_key, metadata=md)
+
+                        return job, time.clock() - start
+
+                    # imap_unordered yields completions in this thread, so
+                    # the callback never runs off the calling thread.
+                    for job, dt in pool.imap_unordered(upload, to_upload):
+                        if cb:
+                            cb('Pushed', job[2], dt)
+
+                finally:
+                    pool.close()
+                    pool.join()
+
+                if not dry_run:
+                    (database.session.query(File)
+                     .filter(File.oid.in_([job[0].oid for job in jobs]))
+                     .update({File.state: 'pushed'}, synchronize_session=False))
+
+                    database.commit()
 
             try:
                 upstream.store_list()
@@ -983,12 +1398,17 @@ class Library(object):
 
     def clean(self, add_config_root=True):
         self.database.clean(add_config_root=add_config_root)
+        self._clear_resolve_cache()
+
+        # Invalidate the list_bundles memo; everything it listed is gone.
+        self._bundles_cache_epoch += 1
 
     def purge(self):
         """Remove all records from the library database, then delete all
         files from the cache"""
         self.clean()
         self.cache.clean()
+        self._known_cache_keys = None
 
     #
     # Synchronize
@@ -998,8 +1418,75 @@ class Library(object):
         """Mark an object as recently updated, for instance to clear
         the doc_cache"""
 
+        self._bundles_cache_epoch += 1
+
         self.doc_cache.remove(vid, _key=key)
 
+    def mark_updated_batch(self, vids=(), keys=()):
+        """Like mark_updated, but invalidates several entries against a
+        single doc-cache handle instead of one per call."""
+
+        self._bundles_cache_epoch += 1
+
+        dc = self.doc_cache
+
+        for vid in vids:
+            dc.remove(vid)
+
+        for key in keys:
+            dc.remove(None, _key=key)
+
+    def _iter_db_files(self, root):
+        """Yield the paths of the .db files under a cache directory,
+        skipping partition directories and meta directories."""
+
+        walk = _walk if _walk is not None else os.walk
+
+        for r, d, f in walk(root, topdown=True):
+
+            # Exclude all of the directories which have the same basename
+            # as a database file. These hold only partitions.
+            files = frozenset(f)
+            d[:] = [dr for dr in d if dr + ".db" not in files]
+
+            if '/meta/' in r:
+                continue
+
+            for file_ in f:
+                if file_.endswith(".db"):
+                    yield os.path.join(r, file_)
+
+    def _bundle_file_info(self, path_):
+        """Classify a cache .db file with two direct sqlite queries instead
+        of bootstrapping a bundle. Returns (is_bundle, partition_count), or
+        None when the file needs a full bundle open to classify."""
+
+        import sqlite3
+
+        try:
+            conn = sqlite3.connect(path_)
+        except sqlite3.Error:
+            return None
+
+        try:
+            try:
+                conn.execute('PRAGMA query_only = 1')
+
+                (n,) = conn.execute('SELECT count(*) FROM datasets').fetchone()
+
+                if n != 1:
+                    # Zero or several dataset records; let the bundle open
+                    # sort out what this file is.
+                    return None
+
+                (pn,) = conn.execute('SELECT count(*) FROM partitions').fetchone()
+
+                return True, pn
+            except sqlite3.Error:
+                return None
+        finally:
+            conn.close()
+
     def sync_library(self, clean=False):
         '''Rebuild the database from the bundles that are already installed
         in the repository cache'''
@@ -1011,86 +1498,105 @@ class Library(object):
             self.files.query.type(Files.TYPE.BUNDLE).delete()
             self.files.query.type(Files.TYPE.PARTITION).delete()
 
-        bundles = []
+        found = []  # (path, partition count) pairs
 
-        self.logger.info('Rebuilding from dir {}'.format(self.cache.cache_dir))
+        self.logger.info('Rebuilding from dir %s', self.cache.cache_dir)
 
-        for r, d, f in os.walk(self.cache.cache_dir, topdown=True):
+        for path_ in self._iter_db_files(self.cache.cache_dir):
 
-            # Exclude all of the directories which have the same basename
-            # as a database file. These hold only partitions.
-            d[:] = [dr for dr in d if dr + ".db" not in f]
+            # Classifying through raw sqlite skips the ORM bootstrap, which
+            # dominates the walk on large caches.
+            info = self._bundle_file_info(path_)
 
-            if '/meta/' in r:
-                continue
+            if info is not None:
+                is_bundle, p_count = info
 
-            for file_ in f:
+                if is_bundle:
+                    found.append((path_, p_count))
 
-                if file_.endswith(".db"):
+                continue
 
-                    path_ = os.path.join(r, file_)
+            b = None
+            keep = False
+            try:
+                b = self._create_bundle(path_)
 
-                    b = None
-                    try:
-                        b = self._create_bundle(path_)
+                try:
+                    b.identity
+                except Exception as e:
+                    self.logger.error("Failed to open bundle from %s: %s ", path_, e)
+                    continue
 
-                        try:
-                            b.identity
-                        except Exception as e:
-                            self.logger.error("Failed to open bundle from {}: {} ".format(path_, e))
-                            continue
+                if b.identity.is_bundle:
+                    # Take the partition count while the database is open;
+                    # sorting on b.partitions.count below would reopen the
+                    # bundle just to run the COUNT.
+                    found.append((path_, b.partitions.count))
 
-                        if b.identity.is_bundle:
-                            bundles.append(b)
+                    # Leave the handle open; the install loop gets the same
+                    # instance back from the bundle cache, and the LRU keeps
+                    # the number of open bundles bounded.
+                    keep = True
 
-                    except NotFoundError:
-                        # Probably a partition, not a bundle.
-                        pass
-                    except Exception as e:
-                        self.logger.error('Failed to process {}, {} : {} '
-                                          .format(file_, path_, e))
-                        raise
-                    finally:
-                        if b:
-                            b.close()
+            except NotFoundError:
+                # Probably a partition, not a bundle.
+                pass
+            except Exception as e:
+                self.logger.error('Failed to process {}, {} : {} '
+                                  .format(os.path.basename(path_), path_, e))
+                raise
+            finally:
+                if b and not keep:
+                    b.close()
+
+        # Order by partition count, with the path as a deterministic
+        # tie-break.
+        found.sort(key=lambda pair: (pair[1], pair[0]))
 
-        bundles = sorted(bundles, key=lambda b: b.partitions.count)
+        bundles = []
 
-        for bundle in bundles:
+        # Install in chunks under a single transaction per chunk, rather
+        # than paying for a commit and a connection teardown per bundle.
+        try:
+            for n, (path_, _) in enumerate(found, 1):
 
-            self.logger.info('Installing: {} '.format(bundle.identity.vname))
+                bundle = self._create_bundle(path_)
+                bundles.append(bundle)
 
-            try:
-                try:
-                    # Not installing partitions so can report progress on them later
-                    self.put_bundle(bundle, self.cache.repo_id, install_partitions=False, commit=True)
-                    installed = True
-                except ConflictError:
-                    installed = False
+                self.logger.info('Installing: %s ', bundle.identity.vname)
 
                 try:
+                    try:
+                        # Not installing partitions so can report progress on them later
+                        self.put_bundle(bundle, self.cache.repo_id, install_partitions=False, commit=False)
+                        installed = True
+                    except ConflictError:
+                        installed = False
 
                     if installed:
                         for p in bundle.partitions:
                             if self.put_partition(p, self.cache.repo_id, commit=False):
-                                self.logger.info('            {} '.format(p.identity.vname))
+                                self.logger.info('            %s ', p.identity.vname)
+
+                    bundle.close()
 
-                    self.database.commit()
-                    self.database.close()
                 except Exception as e:
-                    self.logger.error('Failed to sync {}; {}'.format(bundle.identity.vname, e))
+                    self.logger.error('Failed to install bundle %s: %s', bundle.identity.vname, e)
                     raise
 
-                bundle.close()
+                if n % self.SYNC_COMMIT_BATCH == 0:
+                    self.database.commit()
 
-            except Exception as e:
-                self.logger.error('Failed to install bundle {}: {}'
-                                  .format(bundle.identity.vname, e.message))
-                raise
+            self.database.commit()
+        except:
+            self.database.rollback()
+            raise
+        finally:
+            self.database.close()
 
         return bundles
 
-    def sync_remotes(self, remotes=None, clean=False, last_only=True, vids=None):
+    def sync_remotes(self, remotes=None, clean=False, last_only=True, vids=None, workers=8):
         """Sync the local library with all of the remotes,
         create static JSON, and  build the full-text search index"""
 
@@ -1107,37 +1613,65 @@ class Library(object):
         if not remotes:
             return
 
+        synced_n = 0
+
         for remote_name, remote in remotes.items():
 
             try:
                 remote_list = remote.list().keys()
-                self.logger.info("Syncing from remote: {} -> {} ".format(remote_name, remote))
+                self.logger.info("Syncing from remote: %s -> %s ", remote_name, remote)
             except S3ResponseError as e:
-                self.logger.error("Failed to get list from {} -> {} : {} ".format(remote_name, remote, e))
+                self.logger.error("Failed to get list from %s -> %s : %s ", remote_name, remote, e)
                 continue
 
+            # A digest of the listing identifies a remote that hasn't
+            # changed since the last sync, so repeated syncs stop after the
+            # LIST instead of re-filtering and re-querying per key. Clean
+            # and vid-limited syncs can't skip, since their state isn't
+            # captured by the listing.
+            keys_digest = hashlib.md5('\n'.join(sorted(remote_list))).hexdigest()
+
+            if not clean and not vids:
+                state = self.database.get_config_value('sync', remote.repo_id)
+
+                if state and state.value == keys_digest:
+                    self.logger.info("Remote %s is unchanged; skipping", remote_name)
+                    continue
+
             remote_files = self.files.query.type(Dataset.LOCATION.REMOTE).source_url(remote.repo_id).all
-            all_keys = [f.path for f in remote_files]
 
-            last_keys = defaultdict(lambda: [0, ''])
+            # Membership sets; the loop below tests every remote key against
+            # both of these.
+            all_keys = set(f.path for f in remote_files)
 
             use_only = None
 
             if last_only:
-                use_only = []
+
+                # Single pass to find the highest version per unversioned key.
+                last_keys = {}
+
                 for cache_key in remote_list:
-                    # Key without the version
-                    nv_key = re.sub(r'-\d+\.\d+\.\d+\.db', '', cache_key)
-                    try:
-                        version = int(re.search(r'(\d+)\.db$', cache_key).group(1))
-                    except AttributeError:
-                        self.logger.error("Failed to find version numbers in '{}' ".format(cache_key))
 
-                    if version > last_keys[nv_key][0]:
-                        last_keys[nv_key] = [version, cache_key]
+                    # One regex pass gives both the key without the version
+                    # and the version number itself.
+                    m = _version_suffix_re.search(cache_key)
+
+                    if not m:
+                        self.logger.error("Failed to find version numbers in '%s' ", cache_key)
+                        continue
+
+                    nv_key = cache_key[:m.start()]
+                    version = int(m.group(1))
+
+                    cur = last_keys.get(nv_key)
 
-                for version, cache_key in last_keys.values():
-                    use_only.append(cache_key)
+                    if cur is None or version > cur[0]:
+                        last_keys[nv_key] = (version, cache_key)
+
+                use_only = frozenset(ck for _, ck in last_keys.values())
+
+            sync_keys = []
 
             for cache_key in remote_list:
 
@@ -1145,50 +1679,101 @@ class Library(object):
                     continue
 
                 if use_only and cache_key not in use_only:
-                    self.logger.info("Skip old version: ({}".format(cache_key))
+                    self.logger.info("Skip old version: (%s", cache_key)
                     continue
 
                 if self.cache.has(cache_key):  # This is just for reporting.
-                    self.logger.info("Remote {} has: {}".format(remote.repo_id, cache_key))
+                    self.logger.info("Remote %s has: %s", remote.repo_id, cache_key)
 
                 else:
-                    self.logger.info("Remote {} sync: {}".format(remote.repo_id, cache_key))
+                    self.logger.info("Remote %s sync: %s", remote.repo_id, cache_key)
+
+                sync_keys.append(cache_key)
+
+            if not sync_keys:
+                if not vids:
+                    self.database.set_config_value('sync', remote.repo_id, keys_digest)
+                continue
+
+            # The downloads are network bound, so run them through a thread
+            # pool; the sqlite writes stay on this thread, which consumes the
+            # completed downloads as they arrive.
+            from multiprocessing.dummy import Pool as ThreadPool
 
+            def fetch(cache_key):
                 try:
-                    b = self._get_bundle_by_cache_key(cache_key)
+                    return cache_key, self._fetch_cache_key(cache_key), None
                 except S3ResponseError as e:
-                    self.logger.error("Failed to get {} from {} : {} ".format(cache_key, remote, e))
-                    continue
+                    return cache_key, None, e
 
-                if not b:
-                    self.logger.error("Failed to fetch bundle for {} ".format(cache_key))
-                    continue
+            pool = ThreadPool(min(workers, len(sync_keys)))
 
-                vid = str(b.identity.vid)
+            # Count failed keys; the listing digest is only recorded for a
+            # clean pass, so a transiently failed bundle is retried on the
+            # next sync instead of being skipped with the whole remote.
+            failures = 0
 
-                if vids and vid not in vids:
-                    b.close()
-                    continue
+            try:
+                for cache_key, abs_path, fetch_error in pool.imap_unordered(fetch, sync_keys):
 
-                try:
-                    self.put_bundle(b, remote.repo_id, install_partitions=False,
-                                    commit=True, file_state='installed')
+                    if fetch_error is not None:
+                        self.logger.error("Failed to get %s from %s : %s ", cache_key, remote, fetch_error)
+                        failures += 1
+                        continue
+
+                    if not abs_path:
+                        self.logger.error("Failed to fetch bundle for %s ", cache_key)
+                        failures += 1
+                        continue
+
+                    b = self._get_bundle_by_cache_key(cache_key)
+
+                    if not b:
+                        self.logger.error("Failed to fetch bundle for %s ", cache_key)
+                        failures += 1
+                        continue
+
+                    vid = str(b.identity.vid)
+
+                    if vids and vid not in vids:
+                        b.close()
+                        continue
+
+                    try:
+                        self.put_bundle(b, remote.repo_id, install_partitions=False,
+                                        commit=False, file_state='installed')
+
+                    except NotABundle:
+                        self.logger.error("Cache key %s exists, but isn't a valid bundle", cache_key)
+                        failures += 1
+                        b.close()
+                        continue
+                    except Exception as e:
+                        self.logger.error("Failed to put bundle %s: %s", cache_key, e)
+                        self.database.rollback()
+                        b.close()
+                        raise
 
-                except NotABundle:
-                    self.logger.error("Cache key {} exists, but isn't a valid bundle".format(cache_key))
-                    b.close()
-                    continue
-                except Exception as e:
-                    self.logger.error("Failed to put bundle {}: {}".format(cache_key, e))
                     b.close()
-                    raise
 
-                self.database.commit()
-                self.database.close()
-                b.close()
+                    synced_n += 1
+
+                    if synced_n % self.SYNC_COMMIT_BATCH == 0:
+                        self.database.commit()
+
+            finally:
+                pool.close()
+                pool.join()
+
+            # One commit per remote instead of one per bundle.
+            self.database.commit()
 
-        self.mark_updated(key="bundle_index")
-        self.mark_updated(key="library_info")
+            # A vid-limited pass skips keys without installing them, so its
+            # digest would hide those keys from the next full sync.
+            if not vids and not failures:
+                self.database.set_config_value('sync', remote.repo_id, keys_digest)
+
+        self.mark_updated_batch(keys=('bundle_index', 'library_info'))
 
     def sync_source(self, clean=False):
         """Rebuild the database from the bundles that are already installed
@@ -1196,20 +1781,92 @@ class Library(object):
         if clean:
             self.files.query.type(Dataset.LOCATION.SOURCE).delete()
 
-        for ident in self.source._dir_list().values():
+        idents = self.source._dir_list().values()
+
+        self._prefetch_source_bundles(idents)
+
+        # Identities flushed since the last commit. A failed install
+        # invalidates the whole pending transaction, so on error the batch
+        # is rolled back and replayed with per-directory commits, which
+        # also gives the failed directory the per-step conflict handling.
+        pending = []
+
+        for ident in idents:
 
             try:
                 path = ident.bundle_path
-                self.sync_source_dir(ident, path)
+                self.sync_source_dir(ident, path, commit=False)
+                pending.append(ident)
 
             except Exception as e:
-                self.logger.error("Failed to sync: bundle_path={} : {} ".format(ident.bundle_path, e.message))
+                self.logger.error("Failed to sync: bundle_path=%s : %s ", ident.bundle_path, e)
+
+                self.database.rollback()
+
+                for replay in pending + [ident]:
+                    try:
+                        self.sync_source_dir(replay, replay.bundle_path)
+                    except Exception as e:
+                        self.logger.error("Failed to sync: bundle_path=%s : %s ",
+                                          replay.bundle_path, e)
+
+                pending = []
 
         self.database.commit()
 
-    def sync_source_dir(self, ident, path):
+    def _prefetch_source_bundles(self, idents, workers=None):
+        """Load the source bundles for a set of identities through a thread
+        pool. Loading one reads the bundle config and meta files, so the
+        loads are I/O bound; the database writes in sync_source_dir stay on
+        the calling thread, which picks the loaded bundles out of
+        self._source_bundles."""
+
+        import multiprocessing
+        from multiprocessing.dummy import Pool as ThreadPool
+
+        self._source_bundles = {}
+
+        paths = []
+
+        for ident in idents:
+            try:
+                paths.append(ident.bundle_path)
+            except Exception:
+                pass  # sync_source reports these per-ident
+
+        if not paths:
+            return
+
+        def load(path):
+            try:
+                return path, self.source.bundle(path, buildbundle_ok=True)
+            except Exception:
+                # sync_source_dir retries on the calling thread and reports
+                # the failure there.
+                return path, None
+
+        pool = ThreadPool(min(workers or multiprocessing.cpu_count(), len(paths)))
+
+        try:
+            for path, bundle in pool.map(load, paths):
+                if bundle is not None:
+                    self._source_bundles[path] = bundle
+        finally:
+            pool.close()
+            pool.join()
+
+    def sync_source_dir(self, ident, path, commit=True):
+
+        self.logger.info('Installing: %s ', ident.vname)
+
+        # The new identity must be visible to resolve() in this process;
+        # SourceTree.resolve_bundle resolves against SOURCE right after a
+        # sync, and a cached miss would hide the install.
+        self._clear_resolve_cache()
+
+        if not commit:
+            return self._sync_source_dir_batched(ident, path)
 
-        self.logger.info('Installing: {} '.format(ident.vname))
         try:
             self.database.install_dataset_identity(ident)
             self.database.commit()
@@ -1219,7 +1876,10 @@ class Library(object):
             self.database.rollback()
 
         try:
-            bundle = self.source.bundle(path, buildbundle_ok=True)
+            bundle = self._source_bundles.pop(path, None)
+
+            if bundle is None:
+                bundle = self.source.bundle(path, buildbundle_ok=True)
 
             self.files.install_bundle_source(bundle, self.source, commit=True)
             bundle.close()
@@ -1229,6 +1889,23 @@ class Library(object):
             self.logger.error(e)
             self.database.rollback()
 
+    def _sync_source_dir_batched(self, ident, path):
+        """sync_source_dir without the per-step commits; the caller owns the
+        transaction. The installs can't run under SAVEPOINTs -- pysqlite
+        implicitly commits the open transaction before emitting savepoint
+        statements -- so errors propagate, and sync_source rolls the
+        pending batch back and replays it with per-directory commits."""
+
+        self.database.install_dataset_identity(ident, commit=False)
+
+        bundle = self._source_bundles.pop(path, None)
+
+        if bundle is None:
+            bundle = self.source.bundle(path, buildbundle_ok=True)
+
+        self.files.install_bundle_source(bundle, self.source, commit=False)
+        bundle.close()
+
     def sync_warehouse(self, w):
         """Create a reference to the warehouse and link all
         of the partitions to it. """
@@ -1238,40 +1915,58 @@ class Library(object):
 
         s = self.database.session
 
-        # First, load in the partitions.
+        # The same partition is often linked by several manifests as well
+        # as the store; memoize the lookups for the duration of the call.
+        partition_memo = {}
+
+        def get_partition(vid):
+            p = partition_memo.get(vid)
+
+            if p is None:
+                p = partition_memo[vid] = self.partition(vid)
+
+            return p
 
-        for remote_p in w.library.partitions:
-            p = self.partition(remote_p.vid)
+        # The links live in the objects' data JSON columns, so every
+        # link_* call dirties a row, and each partition lookup would
+        # autoflush all of them; hold the flush until the single commit
+        # at the end.
+        with s.no_autoflush:
 
-            store.link_partition(p)
-            p.link_store(store)
-            p.dataset.link_store(store)
+            # First, load in the partitions.
 
-        # Next, we can load the manifests.
+            for remote_p in w.library.partitions:
+                p = get_partition(remote_p.vid)
 
-        for remote_manifest in w.manifests:
+                store.link_partition(p)
+                p.link_store(store)
+                p.dataset.link_store(store)
 
-            # Copy the file record. There really should be an easier way
-            # to do this.
+            # Next, we can load the manifests.
 
-            local_manifest = self.files.install_manifest(remote_manifest, warehouse=w)
+            for remote_manifest in w.manifests:
 
-            for p in remote_manifest.linked_partitions:
-                p = self.partition(p.vid)
+                # Copy the file record. There really should be an easier way
+                # to do this.
 
-                local_manifest.link_partition(p)
-                p.link_manifest(local_manifest)
+                local_manifest = self.files.install_manifest(remote_manifest, warehouse=w)
 
-                p.dataset.link_manifest(local_manifest)
+                for p in remote_manifest.linked_partitions:
+                    p = get_partition(p.vid)
 
-            local_manifest.link_store(store)
+                    local_manifest.link_partition(p)
+                    p.link_manifest(local_manifest)
 
-            # This is the cheaper way to copy links, but it only works
-            # when the linksare one-directional.
-            local_manifest.data['tables'] = remote_manifest.data.get('tables', [])
+                    p.dataset.link_manifest(local_manifest)
 
-            local_manifest.link_store(store)
-            store.link_manifest(local_manifest)
+                local_manifest.link_store(store)
+
+                # This is the cheaper way to copy links, but it only works
+                # when the linksare one-directional.
+                local_manifest.data['tables'] = remote_manifest.data.get('tables', [])
+
+                local_manifest.link_store(store)
+                store.link_manifest(local_manifest)
 
         s.commit()
 
@@ -1283,14 +1978,18 @@ class Library(object):
 
         for f in self.stores:
             w = self.warehouse(f.path)
-            self.logger.info('Syncing {} dsn={}'.format(f.ref, f.path))
+            self.logger.info('Syncing %s dsn=%s', f.ref, f.path)
             self.sync_warehouse(w)
 
     @property
     def doc_cache(self):
         """Return the documentation cache. """
         from ambry.library.doccache import DocCache
-        return DocCache(self)
+
+        if self._doc_cache_obj is None:
+            self._doc_cache_obj = DocCache(self)
+
+        return self._doc_cache_obj
 
     @property
     def warehouse_cache(self):
@@ -1321,16 +2020,19 @@ class Library(object):
 
         header = g.next()
 
-        w = csv.DictWriter(f, header, encoding='utf-8')
-        w.writeheader()
+        # A plain writer fed header-ordered lists; DictWriter re-maps every
+        # row dict against the header per write.
+        w = csv.writer(f)
+        w.writerow(header)
         last_table = None
         for row in g:
 
             # Blank row to seperate tables.
             if last_table and row['table'] != last_table:
-                w.writerow({})
+                w.writerow([])
 
-            w.writerow(row)
+            w.writerow([(v.encode('utf-8') if isinstance(v, unicode) else v)
+                        for v in (row.get(h) for h in header)])
 
             last_table = row['table']
 
@@ -1356,7 +2058,8 @@ Remotes:  {remotes}
     @property
     def dict(self):
 
-        remotes = [str(r) for r in self.remotes.items()] if self.remotes else []
+        remotes = self.remotes
+        remotes = [str(r) for r in remotes.items()] if remotes else []
 
         manifests = {}
         for f in self.manifests:
@@ -1383,9 +2086,39 @@ Remotes:  {remotes}
                     remotes=remotes,
                     manifests=manifests,
                     stores=stores,
-                    # This is the slow one, with about half in setting 'about'.
-                    bundles={b.identity.vid: b.summary_dict
-                             for b in self.list_bundles()})
+                    bundles=self.summary_dicts())
+
+    def summary_dicts(self):
+        """A summary_dict per installed bundle, keyed on the bundle vid.
+
+        Loads the configuration rows for all of the bundles with one query,
+        rather than one per bundle as b.summary_dict would."""
+
+        from ..bundle.meta import Top
+
+        bundles = list(self.list_bundles())
+
+        rows_by_dvid = self.database.get_config_rows_many(
+            [b.identity.vid for b in bundles])
+
+        summaries = {}
+
+        for b in bundles:
+            ident = b.identity
+
+            t = Top()
+            t.load_rows(rows_by_dvid[ident.vid])
+
+            # The database config rows don't hold name and identity
+            t.identity = ident.ident_dict
+            t.names = ident.names_dict
+
+            summaries[ident.vid] = dict(
+                meta=t.dict,
+                identity=ident.dict,
+                other_versions=[ov.dict for ov in ident.data.get('other_versions', [])])
+
+        return summaries
 
     @property
     def summary_dict(self):
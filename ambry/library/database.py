@@ -100,12 +100,23 @@ class LibraryDb(object):
 
         if not self._engine:
 
-            # There appears to be a problem related to connection pooling on Linux + Postgres, where
-            # multiprocess runs will throw exceptions when the Datasets table record can't be
-            # found. It looks like connections are losing the setting for the search path to the
-            # library schema.
-            # Disabling connection pooling solves the problem.
-            self._engine = create_engine(self.dsn, poolclass=NullPool, echo=False)
+            if self.driver == 'sqlite':
+                # With WAL mode set in _pragma_on_connect, sqlite supports one
+                # writer and many concurrent readers, so a small connection
+                # pool lets threaded list/resolve/get calls run in parallel
+                # instead of serializing on a single connection.
+                from sqlalchemy.pool import QueuePool
+
+                self._engine = create_engine(
+                    self.dsn, poolclass=QueuePool, pool_size=4, max_overflow=0,
+                    connect_args={'check_same_thread': False}, echo=False)
+            else:
+                # There appears to be a problem related to connection pooling on Linux + Postgres,
+                # where multiprocess runs will throw exceptions when the Datasets table record
+                # can't be found. It looks like connections are losing the setting for the search
+                # path to the library schema.
+                # Disabling connection pooling solves the problem.
+                self._engine = create_engine(self.dsn, poolclass=NullPool, echo=False)
 
             # Easier than constructing the pool
             self._engine.pool._use_threadlocal = True
@@ -469,16 +480,28 @@ class LibraryDb(object):
         This is distinct from get_config_value, which returns the value
         for the library.
 
+        """
+        return self.get_config_rows_many([d_vid])[d_vid]
+
+    def get_config_rows_many(self, d_vids):
+        """Like get_config_rows, but for several datasets with one query.
+
+        Returns a dict mapping each dataset vid to its rows; vids without
+        configuration map to empty lists.
+
         """
         from ambry.orm import Config as SAConfig
         from sqlalchemy import or_
 
-        rows = []
+        rows = dict((d_vid, []) for d_vid in d_vids)
+
+        if not rows:
+            return rows
 
         configs = self.session.query(SAConfig)\
             .filter(
                 or_(SAConfig.group == 'config', SAConfig.group == 'process'),
-                SAConfig.d_vid == d_vid)\
+                SAConfig.d_vid.in_(list(rows)))\
             .all()
 
         for r in configs:
@@ -493,7 +516,7 @@ class LibraryDb(object):
                    parts[2] if len(parts) > 2 else None
                    ), r.value)
 
-            rows.append(cr)
+            rows[r.d_vid].append(cr)
 
         return rows
 
@@ -552,11 +575,15 @@ class LibraryDb(object):
     # Install and remove bundles and partitions
     ##
 
-    def install_dataset_identity(self, identity, data={}, overwrite=True):
+    def install_dataset_identity(self, identity, data={}, overwrite=True, commit=True):
         """Create the record for the dataset.
 
         Does not add an File objects
 
+        With commit=False the caller owns the transaction; the merge is
+        flushed so constraint violations surface here, but nothing is
+        committed or rolled back.
+
         """
         from sqlalchemy.exc import IntegrityError
         from ..dbexceptions import ConflictError
@@ -569,6 +596,11 @@ class LibraryDb(object):
         ds.creator = 'N/A'
         ds.data = data
 
+        if not commit:
+            self.session.merge(ds)
+            self.session.flush()
+            return
+
         try:
             self.session.merge(ds)
             self.commit()
@@ -883,8 +915,22 @@ def _pragma_on_connect(dbapi_con, con_record):
     # dbapi_con.execute('PRAGMA foreign_keys = ON;')
     # Not clear that there is a performance improvement.
 
+    # WAL avoids the rollback-journal fsync per write and lets readers run
+    # while the sync loops are writing; NORMAL skips the per-commit fsync of
+    # the database file but, unlike OFF, still syncs the WAL at checkpoints.
     dbapi_con.execute('PRAGMA journal_mode = WAL')
-    dbapi_con.execute('PRAGMA synchronous = OFF')
+    dbapi_con.execute('PRAGMA synchronous = NORMAL')
     dbapi_con.execute('PRAGMA temp_store = MEMORY')
-    dbapi_con.execute('PRAGMA cache_size = 500000')
+
+    # A negative cache_size is in KiB rather than pages: 64MB.
+    dbapi_con.execute('PRAGMA cache_size = -65536')
+
+    # Read the database through a 256MB memory map, when supported; older
+    # sqlites ignore the pragma.
+    dbapi_con.execute('PRAGMA mmap_size = 268435456')
+
+    # Wait for a lock instead of immediately failing when another process
+    # is writing.
+    dbapi_con.execute('PRAGMA busy_timeout = 5000')
+
     dbapi_con.execute('pragma foreign_keys=ON')
@@ -1,14 +1,50 @@
 """"""
 
+from collections import OrderedDict
+from math import log
+
 from whoosh.fields import SchemaClass, TEXT, KEYWORD, ID, NGRAMWORDS, NGRAM  # , STORED, DATETIME
+from whoosh import scoring
 import os
-from ambry.util import memoize
+
+from sqlalchemy import text
+
+# Compiled once; binding the vid lets the driver reuse the statement
+# instead of parsing new SQL for every bundle.
+_COLUMNS_Q = text("""SELECT t_name, c_name, c_description FROM columns
+        JOIN tables ON c_t_vid = t_vid WHERE t_d_vid = :vid""")
+
+_resum_cache = {}
+
+
+def _resum(g):
+    """Re-calculate the summarization of a grain, since the geoid 0.0.7
+    package had a bug where state level summaries had the same value as
+    state-level allvals.
+
+    Memoized; most grains repeat across bundles and partitions."""
+    from geoid.civick import GVid
+
+    try:
+        return _resum_cache[g]
+    except KeyError:
+        pass
+
+    try:
+        r = str(GVid.parse(g).summarize())
+    except KeyError:
+        r = g
+
+    _resum_cache[g] = r
+
+    return r
 
 
 class DatasetSchema(SchemaClass):
     vid = ID(stored=True, unique=True)  # Object id
     bvid = ID(stored=True)  # bundle vid
     type = ID(stored=True)
+    hash = ID(stored=True)  # Content hash, to skip re-indexing unchanged documents
 
     title = NGRAMWORDS()
 
@@ -22,27 +58,96 @@ class IdentifierSchema(SchemaClass):
     identifier = ID(stored=True)  # Partition versioned id
     type = ID(stored=True)
     name = NGRAM(phrase=True, stored=True, minsize=2, maxsize=8)
+    # The name is indexed as n-grams, so the full names can't be read back
+    # from the term dictionary; this untokenized copy exists for cheap
+    # existence checks in index_identifiers.
+    name_exact = ID
+
+
+class PosSizeWeighting(scoring.WeightingModel):
+    """Weights identifier hits by match position and term length, on top
+    of BM25F."""
+
+    def scorer(self, searcher, fieldname, text, qf=1):
+        return self.PosSizeScorer(searcher, fieldname, text, qf=qf)
+
+    class PosSizeScorer(scoring.BaseScorer):
+        def __init__(self, searcher, fieldname, text, qf=1):
+            self.searcher = searcher
+            self.fieldname = fieldname
+            self.text = text
+            self.qf = qf
+            # One BM25 sub-scorer per query term; building it per scored
+            # document re-initialized BM25F for every hit.
+            self.bm25_scorer = scoring.BM25F().scorer(searcher, fieldname, text, qf=qf)
+            self.len_term = 1.0 / (len(text) / 4 + 1)
+
+        def max_quality(self):
+            return 40
+
+        def score(self, matcher):
+            poses = matcher.value_as("positions")
+            return (2.0 / (poses[0] + 1) + self.len_term +
+                    self.bm25_scorer.score(matcher))
 
 
 class SearchResult(object):
+
+    # Queries can produce thousands of results; slots shrink each one and
+    # speed up the attribute accesses in the hit loop.
+    __slots__ = ('vid', '_b_score', '_p_score', 'bundle_found', 'partitions', '_score')
+
     def __init__(self):
         self.vid = None
-        self.b_score = 0
-        self.p_score = 0
+        self._b_score = 0
+        self._p_score = 0
         self.bundle_found = False
         self.partitions = set()
+        self._score = None
+
+    @property
+    def b_score(self):
+        return self._b_score
+
+    @b_score.setter
+    def b_score(self, v):
+        self._b_score = v
+        self._score = None
+
+    @property
+    def p_score(self):
+        return self._p_score
+
+    @p_score.setter
+    def p_score(self, v):
+        self._p_score = v
+        self._score = None
 
     @property
     def score(self):
         """Compute a total score using the log of the partition score, to reduce the include of bundles
         with a lot of partitions """
 
-        from math import log
+        if self._score is None:
+            self._score = self._b_score + (log(self._p_score) if self._p_score else 0)
 
-        return self.b_score + (log(self.p_score) if self.p_score else 0)
+        return self._score
 
 
 class Search(object):
+
+    # Commit and reopen the dataset writer after this many documents, so
+    # indexing a large library merges segments gradually instead of
+    # accumulating the whole run in one in-memory batch.
+    INDEX_COMMIT_BATCH = 500
+
+    # Bound on the expand_place_ids memo.
+    PLACE_IDS_CACHE_SIZE = 1024
+
+    # Commit and reopen the identifiers writer after this many documents;
+    # census-scale identifier sets otherwise end in one giant merge.
+    IDENTIFIER_COMMIT_BATCH = 50000
+
     def __init__(self, library):
 
         self.library = library
@@ -53,14 +158,31 @@ class Search(object):
         self.i_index_dir = self.cache.path('search/identifiers', propagate=False, missing_ok=True)
         self._dataset_index = None
         self._dataset_writer = None
+        self._dataset_searcher = None
         self._identifier_index = None
 
+        # Lazily-built caches over the index contents; each pair is filled
+        # with a single pass on first access of either member.
+        self._all_datasets = None
+        self._all_partitions = None
+        self._all_identifiers = None
+        self._identifier_map = None
+
+        # Bounded memo of expand_place_ids results; place vocabularies are
+        # static within a process, and the same 'in <place>' filters recur
+        # on every search.
+        self._place_ids_cache = OrderedDict()
+
     def reset(self):
         from shutil import rmtree
 
         if os.path.exists(self.d_index_dir):
             rmtree(self.d_index_dir)
 
+        if self._dataset_searcher is not None:
+            self._dataset_searcher.close()
+            self._dataset_searcher = None
+
         self._dataset_index = None
 
     def get_or_new_index(self, schema, dir):
@@ -74,6 +196,18 @@ class Search(object):
 
             else:
                 index = open_dir(dir)
+
+                # Indexes created before a field was added to the schema
+                # need it added before documents carrying it can be
+                # written.
+                missing = [(name, field) for name, field in schema().items()
+                           if name not in index.schema]
+
+                if missing:
+                    w = index.writer()
+                    for name, field in missing:
+                        w.add_field(name, field)
+                    w.commit()
         except:
             self.library.logger.error("Failed to open search index at: '{}' ".format(dir))
             raise
@@ -87,6 +221,11 @@ class Search(object):
             self._dataset_writer.commit()
             self._dataset_writer = None
 
+        # Drop the shared searcher so the next read sees the new segments.
+        if self._dataset_searcher is not None:
+            self._dataset_searcher.close()
+            self._dataset_searcher = None
+
     @property
     def dataset_index(self):
         # from whoosh.index import create_in, open_dir
@@ -96,24 +235,85 @@ class Search(object):
 
         return self._dataset_index
 
+    @property
+    def dataset_searcher(self):
+        """A shared read searcher over the dataset index.
+
+        Opening a searcher reads the segment metadata and maps the segment
+        files, so the read accessors share one; commit() closes it so new
+        documents become visible."""
+
+        if self._dataset_searcher is None:
+            self._dataset_searcher = self.dataset_index.searcher()
+
+        return self._dataset_searcher
+
     @property
     def dataset_writer(self):
+        import multiprocessing
+
         if not self._dataset_writer:
-            self._dataset_writer = self.dataset_index.writer()
+            # Whoosh's batch mode: parallel sub-writers with a bounded RAM
+            # buffer, each writing its own segment instead of merging while
+            # documents are still being added.
+            self._dataset_writer = self.dataset_index.writer(
+                procs=multiprocessing.cpu_count(), limitmb=512, multisegment=True)
         return self._dataset_writer
 
+    def _load_vid_sets(self):
+        """Build the dataset and partition vid sets with one pass over the
+        index, rather than a full document scan per set."""
+
+        datasets = set()
+        partitions = set()
+
+        for x in self.dataset_searcher.documents():
+            t = x['type']
+
+            if t == 'b':
+                datasets.add(x['vid'])
+            elif t == 'p':
+                partitions.add(x['vid'])
+
+        self._all_datasets = datasets
+        self._all_partitions = partitions
+
     @property
-    @memoize
     def all_datasets(self):
-        return set([x for x in self.datasets])
+        if self._all_datasets is None:
+            self._load_vid_sets()
 
-    def dataset_doc(self, bundle):
-        from geoid.civick import GVid
+        return self._all_datasets
+
+    def _prefetch_columns(self, vids):
+        """Fetch the schema columns for a set of datasets with one query,
+        grouped by dataset vid. dataset_doc otherwise runs a query per
+        bundle, which dominates the indexing time on large libraries."""
+
+        from collections import defaultdict
+
+        columns = defaultdict(list)
+
+        if not vids:
+            return columns
+
+        e = self.library.database.session.execute
 
-        e = bundle.database.session.execute
+        q = ("SELECT t_d_vid, t_name, c_name, c_description FROM columns "
+             "JOIN tables ON c_t_vid = t_vid WHERE t_d_vid IN ({})"
+             .format(','.join("'{}'".format(str(v)) for v in vids)))
 
-        q = """SELECT t_name, c_name, c_description FROM columns
-                JOIN tables ON c_t_vid = t_vid WHERE t_d_vid = '{}' """.format(str(bundle.identity.vid))
+        for row in e(q):
+            columns[row[0]].append(tuple(row[1:]))
+
+        return columns
+
+    def dataset_doc(self, bundle, columns=None):
+
+        if columns is None:
+            e = bundle.database.session.execute
+
+            columns = [tuple(t) for t in e(_COLUMNS_Q, {'vid': str(bundle.identity.vid)})]
 
         doc = u'\n'.join([unicode(x) for x in [bundle.metadata.about.title,
                                                bundle.metadata.about.summary,
@@ -123,25 +323,31 @@ class Search(object):
                                                bundle.identity.name,
                                                bundle.identity.vname,
                                                bundle.metadata.documentation.main,
-                                               '\n'.join([' '.join(list(t)) for t in e(q)])]])
+                                               '\n'.join([' '.join(list(t)) for t in columns])]])
 
         # From the source, make a varity of combinations for keywords:
         # foo.bar.com -> "foo foo.bar foo.bar.com bar.com"
+        # Built incrementally, extending the previous suffix or prefix, so
+        # each combination is joined once instead of re-joining every slice.
         p = unicode(bundle.identity.source).split('.')
-        sources = (['.'.join(g) for g in [p[-i:] for i in range(2, len(p) + 1)]]
-                   + ['.'.join(g) for g in [p[:i] for i in range(0, len(p))]])
 
-        # Re-calculate the summarization of grains, since the geoid 0.0.7 package had a bug where state level
-        # summaries had the same value as state-level allvals
-        def resum(g):
-            try:
-                return str(GVid.parse(g).summarize())
-            except KeyError:
-                return g
+        sources = []
+        suffix = p[-1]
+
+        for part in reversed(p[:-1]):
+            suffix = part + '.' + suffix
+            sources.append(suffix)
+
+        prefix = ''
+        sources.append(prefix)
+
+        for part in p[:-1]:
+            prefix = part if not prefix else prefix + '.' + part
+            sources.append(prefix)
 
         keywords = (
             list(bundle.metadata.about.groups) + list(bundle.metadata.about.tags) +
-            [resum(g) for g in bundle.metadata.coverage.grain] + list(bundle.metadata.coverage.geo) +
+            [_resum(g) for g in bundle.metadata.coverage.grain] + list(bundle.metadata.coverage.geo) +
             list(bundle.metadata.coverage.time) + sources)
 
         d = dict(
@@ -150,27 +356,54 @@ class Search(object):
             bvid=unicode(bundle.identity.vid),
             title=unicode(bundle.identity.name) + u' ' + unicode(bundle.metadata.about.title),
             doc=unicode(doc),
-            keywords=u' '.join(unicode(x) for x in keywords)
+            # Deduplicated and sorted; repeated gvids and source forms
+            # otherwise inflate the keyword posting lists. Case is kept
+            # as-is, since KEYWORD terms match exactly.
+            keywords=u' '.join(sorted(set(unicode(x) for x in keywords if x)))
         )
 
+        d['hash'] = self._content_hash(d)
+
         return d
 
-    def index_dataset(self, bundle, force=False):
+    @staticmethod
+    def _content_hash(d):
+        """A hash over a document's fields, stored with the document so a
+        re-index can skip documents whose content hasn't changed."""
+        import hashlib
+
+        h = hashlib.md5()
+
+        for k in sorted(d):
+            h.update((u'{}\x00{}\x01'.format(k, d[k])).encode('utf8'))
+
+        return unicode(h.hexdigest())
 
-        if bundle.identity.vid in self.all_datasets and not force:
+    def index_dataset(self, bundle, force=False, columns=None):
+
+        vid = bundle.identity.vid
+
+        if vid in self.all_datasets and not force:
             return
 
-        d = self.dataset_doc(bundle)
+        d = self.dataset_doc(bundle, columns=columns)
 
         if force:
-            self.dataset_writer.delete_by_term( 'vid', unicode( bundle.identity.vid))
+            # Most forced re-scans hit unchanged bundles; compare content
+            # hashes and skip the delete-and-rewrite when they match.
+            indexed = self.dataset_searcher.document(vid=unicode(vid))
+
+            if indexed and indexed.get('hash') == d['hash']:
+                self.all_datasets.add(vid)
+                return
+
+            self.dataset_writer.delete_by_term('vid', unicode(vid))
 
         self.dataset_writer.add_document(**d)
 
-        self.all_datasets.add(bundle.identity.vid)
+        self.all_datasets.add(vid)
 
     def partition_doc(self, p):
-        from geoid.civick import GVid
 
         schema = ' '.join(
             "{} {} {} {} {}".format(
@@ -180,85 +413,125 @@ class Search(object):
                 c.altname,
                 c.description) for c in p.table.columns)
 
-        values = ''
+        # Collect the unique values as parts and join once at the end;
+        # repeated += on a string is quadratic when the value lists are
+        # large.
+        value_parts = []
 
         for col_name, stats in p.stats.items():
             if stats.uvalues:
-                values += ' '.join(stats.uvalues) + '\n'
+                value_parts.append(' '.join(stats.uvalues))
+                value_parts.append('\n')
 
-        # Re-calculate the summarization of grains, since the geoid 0.0.7 package had a bug where state level
-        # summaries had the same value as state-level allvals
-        def resum(g):
-            try:
-                return str(GVid.parse(g).summarize())
-            except KeyError:
-                return g
+        values = ''.join(value_parts)
 
-        keywords = (
-            ' '.join(p.data.get('geo_coverage', [])) + ' ' +
-            ' '.join([resum(g) for g in p.data.get('geo_grain', [])]) + ' ' +
-            ' '.join(str(x) for x in p.data.get('time_coverage', []))
+        keyword_parts = (
+            list(p.data.get('geo_coverage', [])) +
+            [_resum(g) for g in p.data.get('geo_grain', [])] +
+            [str(x) for x in p.data.get('time_coverage', [])]
         )
 
+        keywords = ' '.join(sorted(set(unicode(x) for x in keyword_parts if x)))
+
+        doc = u' '.join([unicode(values), unicode(schema),
+                         unicode(p.identity.vid), unicode(p.identity.id_),
+                         unicode(p.identity.name), unicode(p.identity.vname)])
+
         d = dict(type=u'p',
                  vid=unicode(p.identity.vid),
                  bvid=unicode(p.identity.as_dataset().vid),
                  title=unicode(p.table.description),
                  keywords=unicode(keywords),
-                 doc=unicode(values + ' ' + schema + ' '
-                             u' '.join([unicode(p.identity.vid), unicode(p.identity.id_), unicode(p.identity.name),
-                                        unicode(p.identity.vname)]))
+                 doc=doc
                  )
 
+        d['hash'] = self._content_hash(d)
+
         return d
 
     def index_partition(self, p, force=False):
 
-        if p.identity.vid in self.all_partitions and not force:
+        vid = p.identity.vid
+
+        if vid in self.all_partitions and not force:
             return
 
-        self.dataset_writer.add_document(**self.partition_doc(p))
+        d = self.partition_doc(p)
+
+        if force:
+            indexed = self.dataset_searcher.document(vid=unicode(vid))
 
-        self.all_partitions.add(p.identity.vid)
+            if indexed and indexed.get('hash') == d['hash']:
+                self.all_partitions.add(vid)
+                return
+
+            self.dataset_writer.delete_by_term('vid', unicode(vid))
+
+        self.dataset_writer.add_document(**d)
+
+        self.all_partitions.add(vid)
 
     def index_datasets(self, tick_f=None):
 
         ds_vids = [ds.vid for ds in self.library.datasets()]
 
+        # Datasets are versioned -- changed content gets a new vid -- so
+        # index membership is the incremental check. Filtering up front
+        # means a no-op re-index run does no column prefetch and opens no
+        # bundles at all.
+        new_vids = [vid for vid in ds_vids if vid not in self.all_datasets]
+
+        columns_by_vid = self._prefetch_columns(new_vids)
+
+        # Document production stays on the calling thread: metadata,
+        # partitions and stats all read through the library's single
+        # SQLAlchemy session, which isn't safe to share across threads.
+        # The write side is already parallel -- the batch-mode writer
+        # fans documents out to its sub-writers.
+
         dataset_n = 0
         partition_n = 0
+        doc_n = 0
 
         def tick(d, p):
             if tick_f:
                 tick_f("datasets: {} partitions: {}".format(d, p))
 
-        for vid in ds_vids:
-
-            if vid in self.all_datasets:
-                continue
+        for vid in new_vids:
 
             dataset_n += 1
             tick(dataset_n, partition_n)
 
             bundle = self.library.bundle(vid)
 
-            self.index_dataset(bundle)
+            self.index_dataset(bundle, columns=columns_by_vid[vid])
+            doc_n += 1
 
             for p in bundle.partitions:
                 self.index_partition(p)
                 partition_n += 1
+                doc_n += 1
                 tick(dataset_n, partition_n)
 
             bundle.close()
 
+            # Commit periodically; commit() drops the writer, so the next
+            # document reopens a fresh one and segments merge as the run
+            # goes instead of in one final burst.
+            if doc_n >= self.INDEX_COMMIT_BATCH:
+                self.commit()
+                doc_n = 0
+
         self.commit()
 
     @property
     def datasets(self):
 
-        for x in self.dataset_index.searcher().documents():
-            if x['type'] == 'b':
-                yield x['vid']
+        # Term-filtered iteration: Whoosh walks the type:b posting list and
+        # decodes stored fields only for matching documents, instead of
+        # streaming every document and filtering here.
+        for x in self.dataset_searcher.documents(type=u'b'):
+            yield x['vid']
 
     def search_datasets(self, search_phrase, limit=None):
         """Search for just the datasets."""
@@ -272,24 +545,27 @@ class Search(object):
 
         datasets = defaultdict(SearchResult)
 
-        with self.dataset_index.searcher() as searcher:
+        results = self.dataset_searcher.search(query, limit=limit)
 
-            results = searcher.search(query, limit=limit)
+        for hit in results:
 
-            for hit in results:
+            # One stored-fields read per hit; each hit.get() goes back
+            # through the stored-field proxy.
+            f = hit.fields()
 
-                vid = hit.get('vid')
-                bvid = hit.get('bvid')
-                type = hit.get('type')
+            vid = f.get('vid')
+            bvid = f.get('bvid')
 
-                datasets[bvid].vid = bvid
-                if type == 'b':
-                    datasets[bvid].bundle_found = True
-                    datasets[bvid].b_score += hit.score
-                else:
-                    datasets[bvid].p_score += hit.score
-                    datasets[bvid].partitions.add(vid)
+            result = datasets[bvid]
 
+            result.vid = bvid
+
+            if f.get('type') == 'b':
+                result.bundle_found = True
+                result.b_score += hit.score
+            else:
+                result.p_score += hit.score
+                result.partitions.add(vid)
 
         return datasets
 
@@ -385,14 +661,15 @@ class Search(object):
     @property
     def partitions(self):
 
-        for x in self.dataset_index.searcher().documents():
-            if x['type'] == 'p':
-                yield x['vid']
+        for x in self.dataset_searcher.documents(type=u'p'):
+            yield x['vid']
 
     @property
-    @memoize
     def all_partitions(self):
-        return set([x for x in self.partitions])
+        if self._all_partitions is None:
+            self._load_vid_sets()
+
+        return self._all_partitions
 
     def search_partitions(self, search_phrase, limit=None):
         # from whoosh.qparser import QueryParser
@@ -403,14 +680,12 @@ class Search(object):
 
         query = parser.parse(search_phrase)
 
-        with self.dataset_index.searcher() as searcher:
+        results = self.dataset_searcher.search(query, limit=limit)
 
-            results = searcher.search(query, limit=limit)
-
-            for hit in results:
-                vid = hit.get('vid', False)
-                if vid:
-                    yield vid
+        for hit in results:
+            vid = hit.get('vid', False)
+            if vid:
+                yield vid
 
     @property
     def identifier_index(self):
@@ -424,59 +699,69 @@ class Search(object):
         return self._identifier_index
 
     def index_identifiers(self, identifiers):
+        import multiprocessing
 
         index = self.identifier_index
 
-        writer = index.writer()
+        def batch_writer():
+            # The same batch mode as the dataset writer: parallel
+            # sub-writers with a bounded buffer, each writing its own
+            # segment.
+            return index.writer(
+                procs=multiprocessing.cpu_count(), limitmb=512, multisegment=True)
+
+        writer = batch_writer()
+
+        searcher = index.searcher()
+
+        try:
+            reader = searcher.reader()
+
+            # Read the existing names from the term dictionary instead of
+            # decoding every document's stored fields.
+            all_names = set()
 
-        all_names = set([x['name'] for x in index.searcher().documents()])
+            for t in reader.lexicon('name_exact'):
+                if not isinstance(t, unicode):
+                    t = t.decode('utf8')
+                all_names.add(t)
+
+            if not all_names and reader.doc_count() > 0:
+                # Indexes written before the name_exact field carry no terms
+                # for it; fall back to the stored-field scan once.
+                all_names = set(unicode(x['name']) for x in searcher.documents())
+        finally:
+            searcher.close()
+
+        added = 0
 
         for i in identifiers:
 
             # Could use **i, but expanding it provides a  check on contents of
             # i
-            if i['name'] not in all_names:
+            if unicode(i['name']) not in all_names:
                 writer.add_document(
                     identifier=unicode(i['identifier']),
                     type=unicode(i['type']),
                     name=unicode(i['name']),
+                    name_exact=unicode(i['name']),
                 )
+                added += 1
+
+                if added % self.IDENTIFIER_COMMIT_BATCH == 0:
+                    writer.commit()
+                    writer = batch_writer()
 
         writer.commit()
 
     def search_identifiers(self, search_phrase, limit=10):
 
         from whoosh.qparser import QueryParser
-        from whoosh import scoring
 
         parser = QueryParser("name", schema=self.identifier_index.schema)
 
         query = parser.parse(search_phrase)
 
-        class PosSizeWeighting(scoring.WeightingModel):
-
-            def __init__(self):
-                pass
-
-            def scorer(self, searcher, fieldname, text, qf=1):
-                return self.PosSizeScorer(searcher, fieldname, text, qf=qf)
-
-            class PosSizeScorer(scoring.BaseScorer):
-                def __init__(self, searcher, fieldname, text, qf=1):
-                    self.searcher = searcher
-                    self.fieldname = fieldname
-                    self.text = text
-                    self.qf = qf
-                    self.bmf25 = scoring.BM25F()
-
-                def max_quality(self):
-                    return 40
-
-                def score(self, matcher):
-                    poses = matcher.value_as("positions")
-                    return (2.0 / (poses[0] + 1) + 1.0 / (len(self.text) / 4 + 1) +
-                            self.bmf25.scorer(searcher, self.fieldname, self.text).score(matcher))
-
         with self.identifier_index.searcher(weighting=PosSizeWeighting()) as searcher:
 
             results = searcher.search(query, limit=limit)
@@ -494,6 +779,29 @@ class Search(object):
         :param terms:
         :return:
         """
+
+        cache = self._place_ids_cache
+
+        try:
+            result = cache.pop(terms)
+            cache[terms] = result  # Re-insert as most recently used
+            return result
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable terms; do the lookup without the cache.
+            return self._expand_place_ids(terms)
+
+        result = self._expand_place_ids(terms)
+
+        cache[terms] = result
+
+        if len(cache) > self.PLACE_IDS_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        return result
+
+    def _expand_place_ids(self, terms):
         from geoid.civick import GVid
         from geoid.util import iallval
         import itertools
@@ -527,20 +835,37 @@ class Search(object):
         for x in self.identifier_index.searcher().documents():
             yield x
 
+    def _load_identifier_maps(self):
+        """Build both identifier lookups with one pass over the
+        identifier index."""
+
+        all_identifiers = {}
+        identifier_map = {}
+
+        for x in self.identifiers:
+            name = x['name']
+
+            all_identifiers[x['identifier']] = name
+
+            if len(name) > 2:  # Exclude state abbreviations
+                identifier_map[x['identifier']] = name
+
+        self._all_identifiers = all_identifiers
+        self._identifier_map = identifier_map
+
     @property
-    @memoize
     def all_identifiers(self):
-        return {x['identifier']: x['name'] for x in self.identifiers}
+        if self._all_identifiers is None:
+            self._load_identifier_maps()
+
+        return self._all_identifiers
 
     @property
-    @memoize
     def identifier_map(self):
-        m = {}
-        for x in self.identifiers:
-            if len(x['name']) > 2:  # Exclude state abbreviations
-                m[x['identifier']] = x['name']
+        if self._identifier_map is None:
+            self._load_identifier_maps()
 
-        return m
+        return self._identifier_map
 
     def from_to_as_term(self, frm, to):
         """ Turn from and to into the query format.
@@ -624,35 +949,80 @@ class SearchTermParser(object):
     def s_year(scanner, token):
         return SearchTermParser.YEAR, int(token.lower().strip())
 
-    def __init__(self):
+    # Shared, built once on first instantiation: the token regex, the
+    # NLTK stemmer and the stemmed by_terms are the same for every parser,
+    # and make_query_from_terms constructs a parser per call.
+    _token_re = None
+    _dispatch = None
+    _stemmer = None
+    _by_terms_stemmed = None
+    _stem_cache = None
+
+    @classmethod
+    def _build(cls):
         # I have no idea which one to pick
         from nltk.stem.lancaster import LancasterStemmer
         import re
 
         mt = '|'.join(
-            [r"\b" + x.upper() + r"\b" for x in self.marker_terms.keys()])
+            [r"\b" + x.upper() + r"\b" for x in cls.marker_terms.keys()])
+
+        # One alternation with a named group per token type, dispatched on
+        # lastgroup, rather than a re.Scanner, which loops over the
+        # alternatives in Python. The branch order matches the old scanner's,
+        # so the first branch matching at a position still wins.
+        cls._token_re = re.compile('|'.join((
+            r"(?P<ws>\s+)",
+            r"(?P<quoted>['\"].*?['\"])",
+            r"(?P<marker>" + mt.lower() + '|' + mt + r")",
+            r"(?P<year>19[789]\d|20[012]\d)",  # From 1970 to 2029
+            r"(?P<domain>(?:[\w\-\.?])+)",
+            r"(?P<term>.+?\b)",
+        )))
+
+        cls._dispatch = {
+            'quoted': cls.s_quotedterm,
+            'marker': cls.s_markerterm,
+            'year': cls.s_year,
+            'domain': cls.s_domainname,
+            'term': cls.s_term,
+        }
+
+        cls._stemmer = LancasterStemmer()
+        cls._stem_cache = {}
+
+        cls._by_terms_stemmed = [cls._stemmer.stem(x) for x in cls.by_terms]
+
+    def __init__(self):
 
-        self.scanner = re.Scanner([
-            (r"\s+", None),
-            (r"['\"](.*?)['\"]", self.s_quotedterm),
-            (mt.lower(), self.s_markerterm),
-            (mt, self.s_markerterm),
-            (r"19[789]\d|20[012]\d", self.s_year),  # From 1970 to 2029
-            (r"(?:[\w\-\.?])+", self.s_domainname),
-            (r".+?\b", self.s_term),
-        ])
+        cls = type(self)
 
-        self.stemmer = LancasterStemmer()
+        if cls._token_re is None:
+            cls._build()
 
-        self.by_terms = [self.stem(x) for x in self.by_terms]
+        self.stemmer = cls._stemmer
+        self.by_terms = cls._by_terms_stemmed
 
     def scan(self, s):
         s = ' '.join(s.splitlines())  # make a single line
-        # Returns one item per line, but we only have one line
-        return self.scanner.scan(s)[0]
+
+        cls = type(self)
+        dispatch = cls._dispatch
+
+        return [dispatch[m.lastgroup](self, m.group())
+                for m in cls._token_re.finditer(s)
+                if m.lastgroup != 'ws']
 
     def stem(self, w):
-        return self.stemmer.stem(w)
+        # Lancaster stemming is relatively expensive, and the same words
+        # recur across queries.
+        cache = type(self)._stem_cache
+
+        try:
+            return cache[w]
+        except KeyError:
+            stemmed = cache[w] = self.stemmer.stem(w)
+            return stemmed
 
     def parse(self, s):
 
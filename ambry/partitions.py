@@ -36,6 +36,15 @@ class Partitions(object):
     def __init__(self, bundle):
         self.bundle = bundle
         self._partitions = {}
+        self._prefetched = None
+
+    def prefetch(self, orm_partitions):
+        """Supply the ORM partition records up front, so all builds from
+        memory instead of running the partition query. Used by
+        Library.list_bundles to load partitions for a set of bundles with
+        one query."""
+
+        self._prefetched = list(orm_partitions)
 
     def partition(self, arg, **kwargs):
         """Get a local partition object from either a Partion ORM object, or a
@@ -108,14 +117,18 @@ class Partitions(object):
 
         """
         from ambry.orm import Partition as OrmPartition
-        # from sqlalchemy.orm import joinedload_all
+        from sqlalchemy.orm import subqueryload
         import sqlalchemy.exc
 
+        if self._prefetched is not None:
+            return [self.partition(op) for op in self._prefetched]
+
         try:
             ds = self.bundle.dataset
 
             q = (self.bundle.database.session.query(OrmPartition)
                  .filter(OrmPartition.d_vid == ds.vid)
+                 .options(subqueryload(OrmPartition.table))
                  .order_by(OrmPartition.vid.asc())
                  .order_by(OrmPartition.segment.asc()))
 
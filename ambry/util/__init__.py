@@ -15,6 +15,15 @@ import logging
 from collections import OrderedDict, defaultdict
 
 import yaml
+
+# Use the libyaml C classes when they are available; parsing and emitting the
+# bundle.yaml / meta/*.yaml files is 10x or more faster with them. Resolve the
+# symbols once at import time so callers don't re-check per load.
+try:
+    from yaml import CLoader as YamlLoader, CSafeDumper as YamlSafeDumper
+except ImportError:
+    from yaml import Loader as YamlLoader, SafeDumper as YamlSafeDumper
+
 from flo import *  # Legacy; should convert clients to direct import
 
 
@@ -419,7 +428,7 @@ def patch_file_open():
 # http://stackoverflow.com/questions/528281/how-can-i-include-an-yaml-file-inside-another
 
 
-class YamlIncludeLoader(yaml.Loader):
+class YamlIncludeLoader(YamlLoader):
     def __init__(self, stream):
         self._root = os.path.split(stream.name)[0]
 
@@ -427,11 +436,11 @@ class YamlIncludeLoader(yaml.Loader):
 
 
 # From http://pypi.python.org/pypi/layered-yaml-attrdict-config/12.07.1
-class OrderedDictYAMLLoader(yaml.Loader):
+class OrderedDictYAMLLoader(YamlLoader):
     'Based on: https://gist.github.com/844388'
 
     def __init__(self, *args, **kwargs):
-        yaml.Loader.__init__(self, *args, **kwargs)
+        YamlLoader.__init__(self, *args, **kwargs)
 
         self.dir = None
         for a in args:
@@ -682,7 +691,11 @@ class AttrDict(OrderedDict):
             d = map_view
 
         try:
-            yaml.safe_dump(d, stream, default_flow_style=False, indent=4, encoding='utf-8')
+            # Equivalent to safe_dump(), but routed through the C emitter when
+            # libyaml is installed. The representers above are registered on
+            # SafeRepresenter, which both dumpers inherit from.
+            yaml.dump(d, stream, Dumper=YamlSafeDumper,
+                      default_flow_style=False, indent=4, encoding='utf-8')
         except RepresenterError:
             import pprint
 
@@ -696,7 +709,7 @@ class AttrDict(OrderedDict):
         import yaml
         import json
 
-        o = yaml.load(self.dump())
+        o = yaml.load(self.dump(), Loader=YamlLoader)
 
         return json.dumps(o)
 
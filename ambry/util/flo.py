@@ -34,6 +34,43 @@ class RedirectStdStreams(object):
         self.devnull.close()
 
 
+def _sendfile_copy(fsrc, fdst, buffer_size):
+    """Kernel-side copy when both ends are real files.
+
+    Returns True when the copy was completed this way. A no-op on
+    platforms without os.sendfile, and on file-like objects that don't
+    have a real descriptor.
+    """
+
+    sendfile = getattr(os, 'sendfile', None)
+
+    if sendfile is None:
+        return False
+
+    try:
+        in_fd = fsrc.fileno()
+        out_fd = fdst.fileno()
+    except Exception:
+        return False
+
+    offset = 0
+
+    while True:
+        try:
+            sent = sendfile(out_fd, in_fd, offset, buffer_size)
+        except EnvironmentError:
+            if offset == 0:
+                # Nothing written yet; the caller can fall back to the
+                # buffered loop.
+                return False
+            raise
+
+        if not sent:
+            return True
+
+        offset += sent
+
+
 def copy_file_or_flo(input_, output, buffer_size=64 * 1024, cb=None):
     """ Copy a file name or file-like-object to another
     file name or file-like object"""
@@ -62,6 +99,12 @@ def copy_file_or_flo(input_, output, buffer_size=64 * 1024, cb=None):
             output = open(output, 'wb')
             output_opened = True
 
+        # When there is no progress callback and both ends are real files,
+        # let the kernel move the bytes; it avoids the userspace copy loop
+        # entirely.
+        if cb is None and _sendfile_copy(input_, output, buffer_size):
+            return
+
         # shutil.copyfileobj(input_,  output, buffer_size)
 
         def copyfileobj(fsrc, fdst, length=buffer_size):
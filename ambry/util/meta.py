@@ -108,17 +108,37 @@ class Metadata(object):
         members, so the configuration data
 
         """
-        import copy
-        from collections import OrderedDict
 
-        self._members = {
-            name: attr for name,
-            attr in type(self).__dict__.items() if isinstance(
-                attr,
-                Group)}
+        # The member map depends only on the class, but register_members runs
+        # for every Metadata instance -- once per bundle open -- so cache the
+        # type-dict scan on the class.
+        cls = type(self)
 
-        for name, m in self._members.items():
-            m.init_descriptor(name, self)
+        members = cls.__dict__.get('_members_map')
+
+        if members is None:
+            members = {
+                name: attr for name,
+                attr in cls.__dict__.items() if isinstance(
+                    attr,
+                    Group)}
+
+            cls._members_map = members
+
+        self._members = members
+
+        # Wiring the descriptors -- assigning keys to the shared class-level
+        # group and term objects -- is idempotent, so it only needs to run
+        # for the first instance of each class. Later instances just install
+        # their per-instance term-value skeletons.
+        if '_descriptors_wired' in cls.__dict__:
+            for m in members.values():
+                m.init_instance_values(self)
+        else:
+            for name, m in members.items():
+                m.init_descriptor(name, self)
+
+            cls._descriptors_wired = True
 
     def ensure_loaded(self, group):
         # Called from Group__get__ to ensure that the group is loaded
@@ -257,19 +277,32 @@ class Metadata(object):
     def groups_by_file(self):
         """Returns a map of the files defined in groups, and the groups that
         define those files."""
-        from collections import OrderedDict
-        d = {}
 
-        for name, m in self._members.items():
-            file_ = m._file
+        # The file bindings are fixed at class definition, so flatten the
+        # mapping once per class instead of rescanning members on every
+        # load or write.
+        cls = type(self)
 
-            if not file_:
-                file_ = 'bundle.yaml'
+        d = cls.__dict__.get('_groups_by_file')
 
-            if file_ not in d:
-                d[file_] = []
+        if d is None:
+            d = {}
 
-            d[file_].append(m)
+            for name, m in self._members.items():
+                file_ = m._file
+
+                if not file_:
+                    file_ = 'bundle.yaml'
+
+                if file_ not in d:
+                    d[file_] = []
+
+                d[file_].append(m)
+
+            # Freeze the group lists so cached entries can't be mutated
+            d = {file_: tuple(groups) for file_, groups in d.items()}
+
+            cls._groups_by_file = d
 
         return d
 
@@ -398,6 +431,14 @@ class Group(object):
         self._parent = parent
         self._top = parent._top
 
+    def init_instance_values(self, top):
+        """Install any per-instance term values on a new Metadata instance.
+
+        Most groups store nothing until a value is set; DictGroup installs
+        its null-entry skeleton.
+        """
+        pass
+
     def get_term_instance(self, key):
         m = self._members[key]
         o = copy.copy(m)
@@ -410,6 +451,15 @@ class Group(object):
         o.init_instance(parent)
         return o
 
+    def __copy__(self):
+        # Every term access clones a group or term, so copy.copy() is the
+        # hottest call in metadata traversal. A direct dict copy skips the
+        # copy module's copyreg dispatch.
+        cls = type(self)
+        o = cls.__new__(cls)
+        o.__dict__.update(self.__dict__)
+        return o
+
     def __set__(self, instance, v):
         assert isinstance(v, dict)
 
@@ -447,15 +497,43 @@ class DictGroup(Group, collections.MutableMapping):
 
     """A group that holds key/value pairs."""
 
+    # Shared skeleton of null entries; computed on first init_descriptor
+    _null_template = None
+
     def init_descriptor(self, key, top):
         super(DictGroup, self).init_descriptor(key, top)
 
-        top._term_values[key] = {}
+        self.init_instance_values(top)
 
         for name, m in self._members.items():
-            top._term_values[key][name] = m.null_entry()
             m.init_descriptor(name, top)
 
+    def init_instance_values(self, top):
+
+        if self._null_template is None:
+            # The null-entry skeleton has the same shape for every Metadata
+            # instance. Share the scalar (None) entries in a template and
+            # record which members need a fresh mutable entry per instance.
+            scalars = {}
+            mutables = []
+
+            for name, m in self._members.items():
+                if isinstance(m, ScalarTerm):
+                    scalars[name] = None
+                else:
+                    mutables.append(name)
+
+            self._null_template = (scalars, tuple(mutables))
+
+        scalars, mutables = self._null_template
+
+        tv = dict(scalars)
+
+        for name in mutables:
+            tv[name] = self._members[name].null_entry()
+
+        top._term_values[self._key] = tv
+
     @property
     def _term_values(self):
         # This only works after being instantiated in __get__, which sets
@@ -551,12 +629,22 @@ class TypedDictGroup(DictGroup):
 
         proto.init_descriptor('_proto', self._top)
 
-    def get_term_instance(self, key):
+    def init_instance_values(self, top):
+        # Keys aren't fixed, so there is no skeleton to install.
+        pass
 
-        if '_proto' not in dir(self):
+    def _proto_term(self):
+        """The class-level prototype term, fetched without cloning it
+        through the descriptor protocol."""
+
+        try:
+            return type(self).__dict__['_proto']
+        except KeyError:
             raise AttributeError("TypeDictGroup must have a _proto Term")
 
-        o = copy.copy(self._proto)
+    def get_term_instance(self, key):
+
+        o = copy.copy(self._proto_term())
         o.init_instance(self)
         o._key = key
         return o
@@ -568,7 +656,7 @@ class TypedDictGroup(DictGroup):
         if key not in self._term_values:
             self._term_values[key] = {
                 name: None for name,
-                _ in self._proto._members.items()}
+                _ in self._proto_term()._members.items()}
 
         o = self.get_term_instance(key)
 
@@ -631,12 +719,17 @@ class ListGroup(Group, collections.MutableSequence):
 
         return self._parent._term_values[self._key]
 
-    def get_term_instance(self, key):
+    def _proto_term(self):
+        """See TypedDictGroup._proto_term."""
 
-        if '_proto' not in dir(self):
-            raise AttributeError("TypeDictGroup must have a _proto Term")
+        try:
+            return type(self).__dict__['_proto']
+        except KeyError:
+            raise AttributeError("ListGroup must have a _proto Term")
+
+    def get_term_instance(self, key):
 
-        o = copy.copy(self._proto)
+        o = copy.copy(self._proto_term())
         o.init_instance(self)
         o._key = key
         return o
@@ -732,6 +825,13 @@ class Term(object):
         self._parent = parent
         self._top = parent._top
 
+    def __copy__(self):
+        # See Group.__copy__; terms are cloned once per attribute access.
+        cls = type(self)
+        o = cls.__new__(cls)
+        o.__dict__.update(self.__dict__)
+        return o
+
     def null_entry(self):
         raise NotImplementedError("Not implemented by {}".format(type(self)))
 
@@ -66,7 +66,7 @@ class TestCommand(Command):
     def run(self):
         """ Runs ambry's tests suite."""
         from test.suite import suite
-        unittest.TextTestRunner(verbosity=self.verbosity, failfast=self.failfast).run(suite)
+        unittest.TextTestRunner(verbosity=self.verbosity, failfast=self.failfast).run(suite())
 
 requirements = parse_requirements('requirements.txt', session=uuid.uuid1())
 
@@ -10,6 +10,8 @@ from boto.exception import S3ResponseError
 
 import ckcache
 
+import ambry.library
+
 from sqlite3 import DatabaseError as SqliteDatabaseError
 
 from ckcache.multi import AltReadCache
@@ -30,7 +32,6 @@ from ambry.library.files import Files
 from ambry.orm import File, Dataset, Partition
 from ambry.source import SourceTree
 from ambry import warehouse
-from ambry import util
 from ambry.warehouse.manifest import Manifest
 
 from test.test_library.asserts import assert_spec
@@ -101,20 +102,16 @@ class NewLibraryTest(unittest.TestCase):
             .next_call().raises(S3ResponseError('status', 'reason'))
 
         fake_logger = fudge.Fake('logger')\
-            .expects('error').with_args(arg.contains('Failed to init'))
-
-        # get_logger need 3 return values, first for the LibraryDb constructor logger, second
-        # for the _new_library logger, third for Library constructor.
-        fake_get_logger = fudge.Fake('get_logger')\
-            .expects_call().returns(fudge.Fake().is_a_stub())\
-            .next_call().returns(fake_logger)\
-            .next_call().returns(fudge.Fake().is_a_stub())
+            .expects('error').with_args(arg.contains('Failed to init'), arg.any(), arg.any(), arg.any())
 
+        # _new_library logs through the module-level logger bound at import
+        # time, so patch it directly.
         with fudge.patched_context(ckcache, 'new_cache', fake_new_cache):
-            with fudge.patched_context(util, 'get_logger', fake_get_logger):
+            with fudge.patched_context(ambry.library, '_logger', fake_logger):
                 # prevent sqlite db file creation.
                 with fudge.patched_context(LibraryDb, 'create', fudge.Fake().is_a_stub()):
                     _new_library(config)
+        fudge.verify()
 
 
 class LibraryTest(unittest.TestCase):
@@ -817,7 +814,7 @@ class LibraryTest(unittest.TestCase):
         FileFactory(type_=Files.TYPE.STORE, ref=ref)
         fake_error = fudge.Fake('error')\
             .expects_call()\
-            .with_args(arg.contains('Didn\'t find warehouse'))
+            .with_args(arg.contains('Didn\'t find warehouse'), arg.any())
 
         fake_warehouse = fudge.Fake('warehouse')\
             .expects_call()\
@@ -1300,7 +1297,7 @@ class LibraryTest(unittest.TestCase):
             .with_args(arg.contains('file1.db'))
         fake_error = fudge.Fake()\
             .expects_call()\
-            .with_args(arg.contains('Failed to open bundle'))
+            .with_args(arg.contains('Failed to open bundle'), arg.any(), arg.any())
         fake_walk = fudge.Fake().expects_call()\
             .returns(walk_return)
 
@@ -1374,9 +1371,9 @@ class LibraryTest(unittest.TestCase):
 
         fake_error = fudge.Fake('error')\
             .expects_call()\
-            .with_args(arg.contains('Failed to get list from'))\
+            .with_args(arg.contains('Failed to get list from'), arg.any(), arg.any(), arg.any())\
             .next_call()\
-            .with_args(arg.contains('Failed to get list from'))
+            .with_args(arg.contains('Failed to get list from'), arg.any(), arg.any(), arg.any())
         lib._remotes = {'rem-1': fake_remote1, 'rem-2': fake_remote2}
 
         with fudge.patched_context(lib.logger, 'error', fake_error):
@@ -1409,7 +1406,8 @@ class LibraryTest(unittest.TestCase):
             .expects_call()\
             .with_args(
                 arg.passes_test(lambda x: x.vid == ds1.vid),
-                ds1.identity.bundle_path)
+                ds1.identity.bundle_path,
+                commit=False)
 
         # testing
         with fudge.patched_context(Library, 'source', fake_source):
@@ -1431,7 +1429,7 @@ class LibraryTest(unittest.TestCase):
 
         fake_logger = fudge.Fake('logger')\
             .expects('error')\
-            .with_args(arg.contains('Failed to sync'))
+            .with_args(arg.contains('Failed to sync'), arg.any(), arg.any())
 
         # testing
         with fudge.patched_context(Library, 'source', fake_source):
@@ -10,10 +10,11 @@ from whoosh import index
 from geoid.civick import GVid
 
 import fudge
+from fudge.inspector import arg
 
 from ambry.library import Library
 from ambry.library.database import LibraryDb
-from ambry.library.search import SearchTermParser, SearchResult, Search
+from ambry.library.search import DatasetSchema, SearchTermParser, SearchResult, Search
 
 from test.test_library.factories import DatasetFactory, PartitionFactory
 from test.test_library.asserts import assert_spec
@@ -91,7 +92,8 @@ class SearchTest(unittest.TestCase):
     def _get_fake_identifier(self, search_result=None):
 
         class MyDict(dict):
-            pass
+            def fields(self):
+                return self
 
         if not search_result:
             PARTITION_TYPE = 'p'
@@ -109,8 +111,10 @@ class SearchTest(unittest.TestCase):
                 # returns result of the search need by search_datasets.
                 return search_result
 
-            def documents(self):
-                return search_result
+            def documents(self, **kw):
+                # Like whoosh, filter the documents by the given field terms.
+                return [x for x in search_result
+                        if all(x.get(k) == v for k, v in kw.items())]
 
             def __enter__(self, *args, **kwargs):
                 return self
@@ -165,18 +169,48 @@ class SearchTest(unittest.TestCase):
         # first assert signatures of the functions we are going to mock did not change.
         assert_spec(index.open_dir, ['dirname', 'indexname', 'readonly', 'schema'])
 
-        # prepare state.
-        SCHEMA = 'schema'
-
         # We have to create Search instance before mocking because __init__ uses os modules.
         search = Search(self.lib)
 
         fake_exists.expects_call().with_args(search.d_index_dir).returns(True)
-        fake_open_dir = fudge.Fake().expects_call().with_args(search.d_index_dir)
+        # The index already has every schema field, so no migration runs.
+        fake_index = fudge.Fake('index').has_attr(schema=DatasetSchema())
+        fake_open_dir = fudge.Fake().expects_call()\
+            .with_args(search.d_index_dir)\
+            .returns(fake_index)
+
+        # testing
+        with fudge.patched_context(index, 'open_dir', fake_open_dir):
+            ret = search.get_or_new_index(DatasetSchema, search.d_index_dir)
+        self.assertEquals(ret, fake_index)
+
+    @fudge.patch('os.path.exists')
+    def test_adds_missing_schema_fields_to_existing_index(self, fake_exists):
+        # prepare state.
+        search = Search(self.lib)
+
+        fake_exists.expects_call().with_args(search.d_index_dir).returns(True)
+
+        # An index created before the hash field existed.
+        existing_schema = DatasetSchema()
+        existing_schema.remove('hash')
+
+        fake_writer = fudge.Fake('writer')\
+            .expects('add_field').with_args('hash', arg.any())\
+            .expects('commit')
+
+        fake_index = fudge.Fake('index')\
+            .has_attr(schema=existing_schema)\
+            .expects('writer').returns(fake_writer)
+
+        fake_open_dir = fudge.Fake().expects_call()\
+            .with_args(search.d_index_dir)\
+            .returns(fake_index)
 
         # testing
         with fudge.patched_context(index, 'open_dir', fake_open_dir):
-            search.get_or_new_index(SCHEMA, search.d_index_dir)
+            ret = search.get_or_new_index(DatasetSchema, search.d_index_dir)
+        self.assertEquals(ret, fake_index)
 
     @fudge.patch('os.path.exists')
     def test_logs_error_to_library_logger(self, fake_exists):
@@ -380,12 +414,19 @@ class SearchTest(unittest.TestCase):
             .expects('add_document')\
             .expects('commit')
 
+        class FakeReader(object):
+            def lexicon(self, fieldname):
+                return []
+
+            def doc_count(self):
+                return 0
+
         class FakeSearcher(object):
-            pass
+            def reader(self):
+                return FakeReader()
 
-        FakeSearcher.documents = fudge.Fake()\
-            .expects_call()\
-            .returns([])
+            def close(self):
+                pass
 
         search = Search(self.lib)
 